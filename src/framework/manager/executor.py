@@ -1,6 +1,7 @@
 import asyncio
 from typing import List, Dict, Any, Callable
 import re
+import sys
 import traceback
 from framework.service.diagnostic import framework_log
 
@@ -8,6 +9,8 @@ class executor:
     def __init__(self, **constants):
         # actuator
         self.sessions: Dict[str, Any] = {}
+        # nome azione (es. "create.note") -> funzione già risolta dal modulo
+        self._actions: Dict[str, Callable] = {}
         providers_data = constants.get('providers', [])
         if isinstance(providers_data, dict):
             self.providers = providers_data.get('actuator', [])
@@ -95,18 +98,20 @@ class executor:
         for n in lista:
             for name in n:
                 await messenger.post(domain='debug', message=f"🔄 Caricamento dell'azione: {name}")
-                parts = name.split('.')
-                module_path = f"application.action.{parts[0]}"
-                adapter = parts[0]
-                func_name = parts[1] if len(parts) > 1 else parts[0]
-                module = await language.load_module(
-                    language,
-                    path=module_path,
-                    area='application',
-                    service='action',
-                    adapter=adapter
-                )
-                act_func = getattr(module, func_name)
+                act_func = self._actions.get(name)
+                if act_func is None:
+                    parts = name.split('.')
+                    module_path = f"application.action.{parts[0]}"
+                    adapter = parts[0]
+                    func_name = parts[1] if len(parts) > 1 else parts[0]
+                    module = await language.load_module(
+                        language,
+                        path=module_path,
+                        area='application',
+                        service='action',
+                        adapter=adapter
+                    )
+                    act_func = self._actions[name] = getattr(module, func_name)
                 res = await act_func(**n[name])
                 results.append({name: res})
                 await messenger.post(domain='debug', message=f"✅ Azione '{name}' eseguita con successo.")
@@ -164,14 +169,13 @@ class executor:
         for result in results:
             if isinstance(result, Exception):
                 
-                # Questa funzione stampa il traceback completo sul tuo log/console
-                traceback.print_exception(type(result), result, result.__traceback__)
-                
                 # Un task è fallito. Registra il traceback completo.
                 
-                # Ottieni il traceback completo (come stringa)
+                # Ottieni il traceback completo (come stringa): formattato una
+                # volta sola, la stessa stringa va sulla console e negli errori
                 error_trace = traceback.format_exception(type(result), result, result.__traceback__)
                 full_error_log = "".join(error_trace)
+                sys.stderr.write(full_error_log)
                 
                 # Aggiungi il dettaglio all'elenco degli errori
                 detailed_errors.append(full_error_log)
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class BoundedCache(OrderedDict):
+    """
+    Dizionario con al più maxsize voci: oltre il limite si scarta la voce
+    usata meno di recente, come functools.lru_cache. get e l'assegnazione
+    rinnovano la voce.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        super().__init__()
+
+    def get(self, key, default=None):
+        value = super().get(key, MISSING)
+        if value is MISSING:
+            return default
+        try:
+            self.move_to_end(key)
+        except KeyError:
+            # scartata da un altro thread nel frattempo
+            pass
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            try:
+                self.popitem(last=False)
+            except KeyError:
+                break
@@ -0,0 +1,44 @@
+import unittest
+
+from framework.service.cache import BoundedCache
+
+
+class Testboundedcache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """
+        Oltre maxsize esce la voce usata meno di recente; get la rinnova.
+        """
+        cache = BoundedCache(3)
+        for key in 'abc':
+            cache[key] = key.upper()
+        self.assertEqual(cache.get('a'), 'A')
+        cache['d'] = 'D'
+        self.assertEqual(list(cache), ['c', 'a', 'd'])
+        cache['c'] = 'C2'
+        cache['e'] = 'E'
+        self.assertEqual(list(cache), ['d', 'c', 'e'])
+        self.assertEqual(cache.get('c'), 'C2')
+
+    def test_get_default(self):
+        cache = BoundedCache(2)
+        cache['none'] = None
+        self.assertIsNone(cache.get('none', 'd'))
+        self.assertEqual(cache.get('missing', 'd'), 'd')
+        self.assertIsNone(cache.get('missing'))
+        self.assertNotIn('missing', cache)
+
+    def test_size_never_exceeds_limit(self):
+        cache = BoundedCache(100)
+        for i in range(1000):
+            cache[i] = i
+            cache.get(i - 50)
+            self.assertLessEqual(len(cache), 100)
+        self.assertEqual(list(cache)[-2:], [999, 949])
+        self.assertEqual(len(cache), 100)
+        self.assertIn(899, cache)
+        self.assertNotIn(849, cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
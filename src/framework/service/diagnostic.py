@@ -4,11 +4,13 @@ import ast
 import inspect
 import types
 import hashlib
+import itertools
 import marshal
 import os
 import sys
 import platform
 import socket
+import stat
 import psutil
 import traceback
 import asyncio
@@ -17,6 +19,7 @@ import contextvars
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Set
+from framework.service.cache import BoundedCache
 from framework.service.context import container
 
 if sys.platform == 'emscripten':
@@ -67,7 +70,8 @@ def truncate_value(key: str, value: Any, max_str_len: int = 256, max_list_len: i
 
     elif isinstance(value, (list, tuple, set)):
         if len(value) > max_list_len:
-            truncated_items = list(value)[:max_list_len]
+            # solo i primi elementi, senza copiare l'intera collezione
+            truncated_items = itertools.islice(value, max_list_len)
             processed_items = [
                 truncate_value("", item, max_str_len=30, max_list_len=5)
                 for item in truncated_items
@@ -469,15 +473,21 @@ def framework_log(level: str, message: str, emoji: str = "", depth: int = 1, **k
     from framework.service.telemetry import get_transaction_id
     tx_id = get_transaction_id() or "system"
     
-    # Recupera info sul chiamante con offset variabile
+    # Recupera info sul chiamante con offset variabile: si risale solo fino
+    # al frame richiesto (inspect.stack() costruisce il contesto di sorgente
+    # di tutto lo stack ad ogni log)
     try:
-        frames = inspect.stack()
-        # Se depth > len(frames) usiamo l'ultimo frame disponibile
-        idx = min(depth, len(frames) - 1)
-        frame_info = frames[idx]
-        filename = os.path.basename(frame_info.filename)
-        lineno = frame_info.lineno
+        frame = sys._getframe(0)
+        # Se depth supera lo stack usiamo l'ultimo frame disponibile
+        for _ in range(depth):
+            if frame.f_back is None:
+                break
+            frame = frame.f_back
+        caller_path = frame.f_code.co_filename
+        filename = os.path.basename(caller_path)
+        lineno = frame.f_lineno
     except Exception:
+        caller_path = None
         filename, lineno = "unknown", 0
 
     now = datetime.now()
@@ -564,8 +574,8 @@ def framework_log(level: str, message: str, emoji: str = "", depth: int = 1, **k
             # 1. Analisi Profonda
             module_source = ""
             try:
-                if os.path.exists(frame_info.filename):
-                    with open(frame_info.filename, 'r') as f:
+                if caller_path and os.path.exists(caller_path):
+                    with open(caller_path, 'r') as f:
                         module_source = f.read()
             except Exception:
                 pass
@@ -758,6 +768,10 @@ def _validate_imports(content: str, file_path: str):
                             if isinstance(value, ast.Constant) and isinstance(value.value, str):
                                 _check_single_import(value.value, allowed, project_modules, layer, node.lineno, file_path, is_path=True)
 
+# file -> (mtime_ns, dimensione, contenuto già validato): un file invariato
+# non viene riletto né ri-analizzato da _validate_imports
+_RESOURCES: Dict[str, tuple] = BoundedCache(256)
+
 if sys.platform != 'emscripten':
     async def _load_resource(**kwargs) -> str:
         path = kwargs.get("path", "")
@@ -782,14 +796,26 @@ if sys.platform != 'emscripten':
 
         # Prova i vari candidati
         for p in candidates:
-            if os.path.exists(p) and os.path.isfile(p):
-                try:
-                    with open(p, "r") as f:
-                        content = f.read()
-                        _validate_imports(content, p)
-                        return content
-                except Exception:
-                    continue
+            try:
+                st = os.stat(p)
+            except (OSError, ValueError):
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+
+            cached = _RESOURCES.get(p)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+
+            try:
+                with open(p, "r") as f:
+                    content = f.read()
+                    _validate_imports(content, p)
+            except Exception:
+                continue
+
+            _RESOURCES[p] = (st.st_mtime_ns, st.st_size, content)
+            return content
         
         raise FileNotFoundError(f"File non trovato: {path}. Provati: {candidates}. CWD: {cwd}")
 else:
@@ -1,6 +1,17 @@
 import re
 import framework.service.language as language
 from framework.service.diagnostic import framework_log
+from framework.service.cache import BoundedCache
+
+# template -> chiavi dei placeholder {a.b}: ogni template viene analizzato una volta sola
+_PLACEHOLDER = re.compile(r'\{([\w\.]+)\}')
+_PLACEHOLDERS = BoundedCache(1024)
+
+def _placeholders(template):
+    keys = _PLACEHOLDERS.get(template)
+    if keys is None:
+        keys = _PLACEHOLDERS[template] = tuple(_PLACEHOLDER.findall(template))
+    return keys
 
 class repository():
     def __init__(self, **constants):
@@ -16,7 +27,7 @@ class repository():
             Verifica se una singola stringa `template` può essere formattata utilizzando le chiavi di un dizionario `data`.
             """
             try:
-                placeholders = re.findall(r'\{([\w\.]+)\}', template)
+                placeholders = _placeholders(template)
                 gg = []
                 for key in placeholders:
                     a = language.get(data,key)
@@ -36,7 +47,7 @@ class repository():
             Verifica se una singola stringa `template` può essere formattata utilizzando le chiavi di un dizionario `data`.
             """
             try:
-                placeholders = re.findall(r'\{([\w\.]+)\}', template)
+                placeholders = _placeholders(template)
                 framework_log("DEBUG", f"Formatting template: {template}", emoji="📝", placeholders=placeholders)
                 for key in placeholders:
                     a = language.get(key,data)
@@ -7,6 +7,25 @@ from typing import Any, Callable, Dict, List, Optional
 from framework.service.context import container
 from framework.service.diagnostic import framework_log, log_block, _load_resource, buffered_log, analyze_exception, _get_system_info
 import framework.service.scheme as scheme
+import weakref
+
+# id(funzione) -> (weakref, is_coroutine): evita di ispezionare la funzione ad ogni act
+_COROUTINE_CACHE: Dict[int, tuple] = {}
+
+def is_coroutine_function(function) -> bool:
+    target = getattr(function, '__func__', function)
+    key = id(target)
+    entry = _COROUTINE_CACHE.get(key)
+    if entry is not None and entry[0]() is target:
+        return entry[1]
+
+    flag = asyncio.iscoroutinefunction(function)
+    try:
+        ref = weakref.ref(target, lambda _, key=key: _COROUTINE_CACHE.pop(key, None))
+    except TypeError:
+        return flag
+    _COROUTINE_CACHE[key] = (ref, flag)
+    return flag
 
 def merge_foreach_structure(data):
     # Verifichiamo se l'output contiene la struttura del figlio
@@ -81,23 +100,24 @@ async def act(step, context=dict()):
     
 
     function, inputs, schemes = step
-    nn = []
-    gg = {'@':context}
     if hasattr(inputs,'__iter__'):
-        for i,x in enumerate(inputs):
-            if isinstance(x,str) and x.startswith('@'):
-                
-                ss = scheme.get(gg,x)
-                nn.append(ss)
-            else:
-                nn.append(inputs[i])
-        inputs = tuple(nn)
+        if type(inputs) is not tuple:
+            inputs = tuple(inputs)
+        # una passata sulla tupla corta degli input: senza riferimenti '@'
+        # gli input passano così come sono
+        positions = [i for i, x in enumerate(inputs) if isinstance(x, str) and x.startswith('@')]
+        if positions:
+            gg = {'@':context}
+            nn = list(inputs)
+            for i in positions:
+                nn[i] = scheme.get(gg,nn[i])
+            inputs = tuple(nn)
 
 
     start_time = time.perf_counter()
     try:
         
-        if asyncio.iscoroutinefunction(function):
+        if is_coroutine_function(function):
             result = await function(*inputs,**schemes|context)
         else:
             result = function(*inputs,**schemes|context)
@@ -137,9 +157,11 @@ def aggregate_results(dict_list):
     
     # Esempio di post-elaborazione: 
     # Trasforma in valore singolo se tutti gli elementi sono identici (come 'action')
-    for key in final_data:
-        if all(x == final_data[key][0] for x in final_data[key]):
-            final_data[key] = final_data[key][0]
+    # (list.count confronta in C, senza un generatore per chiave)
+    for key, values in final_data.items():
+        first = values[0]
+        if values.count(first) == len(values):
+            final_data[key] = first
             
     return final_data
 
@@ -232,12 +254,28 @@ async def pipeline(*acts, context={}):
     """
     last_output = None
     ctx = context if context is not None else {}
+
+    # Un solo step: niente contesto degli step successivi né aggregazione
+    # (aggregare un solo risultato ne restituisce una copia)
+    if len(acts) == 1:
+        result = await act(acts[0], ctx)
+        return dict(result) if result.get('success', False) else result
+
     pipeline_results = []
+    # Contesto degli step successivi al primo: copiato una volta sola, ad
+    # ogni step cambia solo 'inputs' (act lo passa all'azione come kwargs)
+    step_ctx = None
 
     for i, action in enumerate(acts):
         # Per il primo step usiamo il contesto originale.
         # Per i successivi, l'input è l'output dello step precedente.
-        current_ctx = ctx if i == 0 else {**ctx, 'outputs':pipeline_results,'inputs': last_output}
+        if i == 0:
+            current_ctx = ctx
+        else:
+            if step_ctx is None:
+                step_ctx = {**ctx, 'outputs': pipeline_results}
+            step_ctx['inputs'] = last_output
+            current_ctx = step_ctx
         
         # Eseguiamo l'azione
         result = await act(action, current_ctx)
@@ -1,5 +1,9 @@
 import asyncio
 import datetime
+import heapq
+import itertools
+import time
+from collections import ChainMap
 from framework.service.flow import framework_log
 
 # ============================================================================
@@ -15,6 +19,14 @@ class TriggerEngine:
     def __init__(self, visitor):
         self.visitor = visitor
         self.tasks = []
+        # (prossimo scatto, seq, maschere, action, ctx): un solo task per i cron
+        self._cron_heap = []
+        self._cron_seq = itertools.count()
+        self._cron_task = None
+        # risveglia lo scheduler quando un nuovo cron entra nell'heap; creato
+        # dallo scheduler nel loop in cui gira (su Python 3.9 un Event si lega
+        # al loop corrente già alla costruzione)
+        self._cron_wakeup = None
 
     # ----------------------------------------------------------------------
 
@@ -28,9 +40,8 @@ class TriggerEngine:
                     self._event_loop(trigger, action, context)
                 )
             elif self._is_cron(trigger):
-                task = asyncio.create_task(
-                    self._cron_loop(trigger, action, context)
-                )
+                self._register_cron(trigger, action, context)
+                continue
             else:
                 continue
 
@@ -59,7 +70,8 @@ class TriggerEngine:
                 result = await self.visitor.visit(call_node, ctx)
 
                 if isinstance(result, dict) and result.get('success'):
-                    event_ctx = {**ctx, '@event': result.get('data')}
+                    # '@event' sopra al contesto, senza copiarlo ad ogni evento
+                    event_ctx = ChainMap({'@event': result.get('data')}, ctx)
                     await self.visitor.visit(action, event_ctx)
                 else:
                     await asyncio.sleep(1)
@@ -71,27 +83,121 @@ class TriggerEngine:
                 await asyncio.sleep(5)
 
     # ----------------------------------------------------------------------
-    # CRON LOOP
+    # CRON SCHEDULER
     # ----------------------------------------------------------------------
 
-    async def _cron_loop(self, pattern, action, ctx):
+    def _register_cron(self, pattern, action, ctx):
         framework_log("INFO", f"Cron trigger: {pattern}", emoji="⏰")
 
-        while True:
-            try:
-                now = datetime.datetime.now()
-                current = (
-                    now.minute,
-                    now.hour,
-                    now.day,
-                    now.month,
-                    now.weekday()
-                )
+        # il primo controllo avviene subito, come per il vecchio _cron_loop
+        heapq.heappush(
+            self._cron_heap,
+            (time.time(), next(self._cron_seq), self._compile_cron(pattern), action, ctx)
+        )
+
+        if self._cron_task is None or self._cron_task.done():
+            self._cron_task = asyncio.create_task(self._cron_scheduler())
+            self.tasks.append(self._cron_task)
+        elif self._cron_wakeup is not None:
+            self._cron_wakeup.set()
+
+    def _compile_cron(self, pattern):
+        # Un intero per campo (minuto, ora, giorno, mese, giorno della
+        # settimana) con il bit del valore ammesso acceso: '*' li accende
+        # tutti (-1), un valore non numerico nessuno
+        masks = []
+        for p in pattern[:5]:
+            if p == '*':
+                masks.append(-1)
+                continue
+            text = str(p)
+            # stessa uguaglianza testuale del vecchio confronto str(p) == str(c)
+            # (nessun campo supera 59)
+            if text.isdecimal() and str(int(text)) == text and int(text) < 60:
+                masks.append(1 << int(text))
+            else:
+                masks.append(0)
+
+        masks += [-1] * (5 - len(masks))
+        return tuple(masks)
+
+    def _next_cron(self, masks, tick):
+        # Primo minuto reale dopo tick che soddisfa le maschere, o None se non
+        # arriverà mai: si salta per mese, giorno e ora interi invece di
+        # svegliarsi ad ogni minuto. Si avanza su timestamp veri, come il
+        # vecchio controllo minuto per minuto: con l'ora legale l'ora saltata
+        # non combacia mai e quella ripetuta combacia due volte
+        mb, hb, db, mob, wb = masks
+        if not (mb and hb and db and mob and wb):
+            return None
+
+        ts = (int(tick) // 60 + 1) * 60
+        # oltre quattro anni (un 29 febbraio compreso) nessuna combinazione nuova
+        limit = ts + 4 * 366 * 86400
+
+        while ts < limit:
+            moment = datetime.datetime.fromtimestamp(ts)
+            if not (mob >> moment.month) & 1:
+                target = (moment.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not (db >> moment.day) & (wb >> moment.weekday()) & 1:
+                target = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif not (hb >> moment.hour) & 1:
+                target = moment.replace(minute=0) + datetime.timedelta(hours=1)
+            elif not (mb >> moment.minute) & 1:
+                ts += 60
+                continue
+            else:
+                return ts
+            ts = max(ts + 60, self._local_floor(target))
+        return None
+
+    def _local_floor(self, moment):
+        # Timestamp da cui ripartire per l'ora locale moment senza superare
+        # nessun minuto reale che la segue: la prima delle due letture di
+        # un'ora ripetuta, un istante prima del salto per un'ora inesistente
+        return int(min(moment.timestamp(), moment.replace(fold=1).timestamp())) // 60 * 60
 
-                if all(p == '*' or str(p) == str(c) for p, c in zip(pattern, current)):
-                    await self.visitor.visit(action, ctx)
+    async def _cron_scheduler(self):
+        heap = self._cron_heap
 
-                await asyncio.sleep(60 - now.second)
+        self._cron_wakeup = asyncio.Event()
+
+        while heap:
+            try:
+                delay = heap[0][0] - time.time()
+                if delay > 0:
+                    # l'attesa può durare ore: un nuovo cron la interrompe
+                    self._cron_wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._cron_wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                tick = time.time()
+                while heap and heap[0][0] <= tick:
+                    fire, seq, masks, action, ctx = heap[0]
+                    mb, hb, db, mob, wb = masks
+
+                    # si confronta il minuto previsto per lo scatto, non quello
+                    # del risveglio: un risveglio in ritardo non salta il cron
+                    at = datetime.datetime.fromtimestamp(fire)
+                    if (mb >> at.minute) & (hb >> at.hour) & (db >> at.day) & (mob >> at.month) & (wb >> at.weekday()) & 1:
+                        # l'azione gira per conto suo: un'azione lenta non
+                        # ritarda lo scheduler né gli altri cron
+                        task = asyncio.ensure_future(self.visitor.visit(action, ctx))
+                        self.tasks.append(task)
+                        task.add_done_callback(self._cron_done)
+
+                    # il prossimo risveglio è il prossimo minuto che combacia
+                    next_fire = self._next_cron(masks, tick)
+                    if next_fire is None:
+                        heapq.heappop(heap)
+                    else:
+                        heapq.heapreplace(
+                            heap,
+                            (next_fire, seq, masks, action, ctx)
+                        )
 
             except asyncio.CancelledError:
                 break
@@ -99,6 +205,15 @@ class TriggerEngine:
                 framework_log("ERROR", f"Cron error: {e}", emoji="❌")
                 await asyncio.sleep(60)
 
+    def _cron_done(self, task):
+        # azione cron terminata: esce da self.tasks e il suo errore va nel log
+        try:
+            self.tasks.remove(task)
+        except ValueError:
+            pass
+        if not task.cancelled() and task.exception() is not None:
+            framework_log("ERROR", f"Cron error: {task.exception()}", emoji="❌")
+
     # ----------------------------------------------------------------------
 
     async def shutdown(self):
@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import datetime
+import heapq
+import os
+import random
+import time
+import unittest
+
+import framework.service.flow2 as flow2
+
+
+class Visitor:
+    """
+    Visitor di prova: ogni action è (nome, secondi di attesa).
+    """
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    async def visit(self, action, ctx):
+        name, delay = action
+        self.started.append((name, time.monotonic()))
+        await asyncio.sleep(delay)
+        self.finished.append(name)
+
+
+class Testscheduler(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.visitor = Visitor()
+        self.engine = flow2.TriggerEngine(self.visitor)
+
+    async def asyncTearDown(self):
+        await self.engine.shutdown()
+
+    async def test_slow_action_does_not_block(self):
+        """
+        Un'azione lenta non ritarda gli altri cron dello scheduler.
+        """
+        every_minute = ['*', '*', '*', '*', '*']
+        start = time.monotonic()
+        self.engine._register_cron(every_minute, ('slow', 1.0), {})
+        await asyncio.sleep(0.05)
+        self.engine._register_cron(every_minute, ('fast', 0), {})
+        await asyncio.sleep(0.1)
+
+        self.assertEqual([name for name, _ in self.visitor.started], ['slow', 'fast'])
+        self.assertEqual(self.visitor.finished, ['fast'])
+        self.assertLess(self.visitor.started[1][1] - start, 0.5)
+
+    async def test_late_wakeup_still_fires(self):
+        """
+        Un cron il cui minuto è passato durante un risveglio in ritardo
+        scatta comunque, una volta sola.
+        """
+        fire = (int(time.time()) // 60 - 1) * 60
+        minute = datetime.datetime.fromtimestamp(fire).minute
+        masks = self.engine._compile_cron([str(minute), '*', '*', '*', '*'])
+        heapq.heappush(self.engine._cron_heap, (fire, 0, masks, ('late', 0), {}))
+
+        self.engine._cron_task = asyncio.create_task(self.engine._cron_scheduler())
+        self.engine.tasks.append(self.engine._cron_task)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.visitor.finished, ['late'])
+        self.assertGreater(self.engine._cron_heap[0][0], time.time())
+
+    async def test_action_tasks_are_released(self):
+        """
+        Le azioni terminate escono da tasks; i loro errori non fermano lo
+        scheduler.
+        """
+        async def failing(action, ctx):
+            raise ValueError("cron")
+
+        self.visitor.visit = failing
+        self.engine._register_cron(['*', '*', '*', '*', '*'], ('x', 0), {})
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.engine.tasks, [self.engine._cron_task])
+        self.assertFalse(self.engine._cron_task.done())
+
+
+def minutes(start, days):
+    """
+    (timestamp, campi locali) di ogni minuto reale da start per days giorni.
+    """
+    table = []
+    for ts in range(start, start + days * 86400, 60):
+        t = datetime.datetime.fromtimestamp(ts)
+        table.append((ts, t.minute, t.hour, t.day, t.month, t.weekday()))
+    return table
+
+
+def scan(masks, table):
+    """
+    Riferimento: i minuti reali della tabella che soddisfano le maschere.
+    """
+    mb, hb, db, mob, wb = masks
+    return [
+        ts for ts, minute, hour, day, month, weekday in table
+        if (mb >> minute) & (hb >> hour) & (db >> day) & (mob >> month) & (wb >> weekday) & 1
+    ]
+
+
+@unittest.skipUnless(hasattr(time, 'tzset'), "serve time.tzset")
+class Testnextcron(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = flow2.TriggerEngine(None)
+        self.tz = os.environ.get('TZ')
+
+    def tearDown(self):
+        if self.tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = self.tz
+        time.tzset()
+
+    def check(self, tz, start, days, patterns, ticks):
+        """
+        _next_cron coincide con la scansione minuto per minuto; oltre la
+        finestra basta che non anticipi.
+        """
+        os.environ['TZ'] = tz
+        time.tzset()
+        start = int(datetime.datetime(*start).timestamp())
+        table = minutes(start, days)
+        end = table[-1][0]
+
+        for pattern in patterns:
+            masks = self.engine._compile_cron(pattern)
+            matches = scan(masks, table)
+            for tick in ticks(start):
+                with self.subTest(tz=tz, pattern=pattern, tick=tick):
+                    i = bisect.bisect_right(matches, tick)
+                    expected = matches[i] if i < len(matches) else None
+                    actual = self.engine._next_cron(masks, tick)
+                    if expected is None:
+                        self.assertTrue(actual is None or actual > end)
+                    else:
+                        self.assertEqual(actual, expected)
+
+    def random_patterns(self, rnd, count, months):
+        fields = [range(60), range(24), range(1, 32), months, range(7)]
+        return [
+            [rnd.choice(['*', str(rnd.choice(values))]) for values in fields]
+            for _ in range(count)
+        ]
+
+    def test_random_patterns(self):
+        """
+        Pattern casuali su minuto, ora, giorno, mese e giorno della settimana.
+        """
+        rnd = random.Random(1)
+        self.check(
+            'UTC', (2026, 1, 20, 10, 17), 40,
+            self.random_patterns(rnd, 60, [1, 2, 3]),
+            lambda start: [start + rnd.randrange(0, 20 * 86400) + rnd.random() for _ in range(5)],
+        )
+
+    def test_daylight_saving(self):
+        """
+        Ora legale: l'ora saltata a marzo non esiste, quella ripetuta a
+        ottobre scatta due volte come nella scansione per minuti reali.
+        """
+        rnd = random.Random(2)
+        fixed = [
+            ['30', '2', '*', '*', '*'],
+            ['*', '2', '*', '*', '*'],
+            ['0', '3', '*', '*', '*'],
+            ['59', '1', '*', '*', '*'],
+            ['0', '*', '*', '*', '6'],
+        ]
+        for month, day in ((3, 28), (10, 24)):
+            self.check(
+                'Europe/Rome', (2026, month, day, 0, 0), 4,
+                fixed + [['*', '2', str(day + 1), str(month), '*']] + self.random_patterns(rnd, 40, [month]),
+                lambda start: [start + offset * 60 + 0.5 for offset in range(0, 4 * 1440, 29)],
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,14 +8,22 @@ Complete & faithful version
 """
 
 import asyncio
+import contextvars
+import datetime
 import inspect
 import operator
+import re
+import sys
+import threading
+from collections import ChainMap
+from types import MappingProxyType
 
 from lark import Lark, Transformer, Token, v_args
 
 import framework.service.scheme as scheme
 import framework.service.flow as flow
 import framework.service.load as load
+from framework.service.cache import BoundedCache
 
 
 # ============================================================================
@@ -113,7 +121,9 @@ OPS_MAP = {
     '==':'EQ','!=':'NEQ','>=':'GTE','<=':'LTE','>':'GT','<':'LT'
 }
 
-OPS_FUNCTIONS = {
+# and/or restano funzioni Python: operator non ha un equivalente logico
+# (and_/or_ sono bit a bit)
+OPS_FUNCTIONS = MappingProxyType({
     'OP_ADD': operator.add, 'OP_SUB': operator.sub,
     'OP_MUL': operator.mul, 'OP_DIV': operator.truediv,
     'OP_MOD': operator.mod, 'OP_POW': operator.pow,
@@ -122,19 +132,58 @@ OPS_FUNCTIONS = {
     'OP_GTE': operator.ge, 'OP_LTE': operator.le,
     'OP_AND': lambda a, b: a and b,
     'OP_OR': lambda a, b: a or b,
-    'OP_NOT': lambda a: not a,
-}
-
-TYPE_MAP = {
+    'OP_NOT': operator.not_,
+})
+
+# Simbolo dell'operatore binario -> funzione (tabella di salto di visit_binop).
+# Chiavi internate come gli "op" emessi dal transformer: la lookup si
+# risolve per identità
+BINARY_OPS = MappingProxyType({
+    **{sys.intern(symbol): OPS_FUNCTIONS[f'OP_{name}'] for symbol, name in OPS_MAP.items()},
+    sys.intern('and'): OPS_FUNCTIONS['OP_AND'],
+    sys.intern('or'): OPS_FUNCTIONS['OP_OR'],
+})
+
+# Tipi nativi: immutabili, i tipi utente vanno in CUSTOM_TYPES
+TYPE_MAP = MappingProxyType({
     'int': int, 'float': float, 'str': str, 'bool': bool,
     'dict': dict, 'list': list, 'any': object, 'type': dict,
     'function': tuple,
 
-}
+})
+
+# isinstance come metodo legato del tipo (type.__instancecheck__): stessa
+# semantica, senza una lambda Python per ogni controllo
+TYPE_CHECKS = MappingProxyType({
+    **{name: t.__instancecheck__ for name, t in TYPE_MAP.items()},
+    'any': lambda v: True,
+})
 
 CUSTOM_TYPES = {}
 
-DSL_FUNCTIONS = {
+# Sentinella per distinguere "assente" da un valore None
+MISSING = object()
+
+# (interprete, stack dei nodi) del ramo valutato in un task proprio da
+# Interpreter._start_branch: i rami paralleli non condividono lo stack
+_BRANCH_STACK = contextvars.ContextVar("dsl_branch_stack", default=None)
+
+# Tipi di risultato che non possono essere awaitable: niente inspect.isawaitable
+PLAIN_RESULTS = frozenset((type(None), bool, int, float, str, bytes, dict, list, tuple, set))
+
+# Built-in di supporto: funzioni vere invece di lambda che allocano una
+# vista o una tupla ad ogni chiamata
+def dsl_keys(d):
+    return list(d) if isinstance(d, dict) else []
+
+def dsl_values(d):
+    return list(d.values()) if isinstance(d, dict) else []
+
+def dsl_print(d):
+    print(d)
+    return d
+
+DSL_FUNCTIONS = MappingProxyType({
     'resource': load.resource,
     'transform': scheme.transform,
     'normalize': scheme.normalize,
@@ -148,10 +197,24 @@ DSL_FUNCTIONS = {
     #'throttle': flow.throttle,
     'retry': flow.retry,
     #'fallback': flow.fallback,
-    'keys': lambda d: list(d.keys()) if isinstance(d, dict) else [],
-    'values': lambda d: list(d.values()) if isinstance(d, dict) else [],
-    'print': lambda d: (print(d), d)[1],
-}
+    'keys': dsl_keys,
+    'values': dsl_values,
+    'print': dsl_print,
+})
+
+
+# pattern glob -> regex compilata: ogni pattern viene tradotto una volta sola
+_GLOBS = BoundedCache(512)
+
+def wildcard_match(data, pattern):
+    """Vero se data corrisponde al pattern ('*' qualsiasi sequenza, '?' un carattere)."""
+    pattern = str(pattern)
+    regex = _GLOBS.get(pattern)
+    if regex is None:
+        regex = _GLOBS[pattern] = re.compile(
+            re.escape(pattern).replace(r'\*', '.*').replace(r'\?', '.'), re.DOTALL
+        )
+    return regex.fullmatch(str(data)) is not None
 
 
 # ============================================================================
@@ -243,13 +306,13 @@ class DSLTransformer(Transformer):
     def identifier(self, meta, s):
         return self.with_meta({
             "type": "var",
-            "name": str(s[0])
+            "name": sys.intern(str(s[0]))
         }, meta)
 
     def key(self, meta, a):
         # Se arriva un Tree, estrai il token e trasformalo
         if isinstance(a[0], Token):
-            return {"type": "var", "name": str(a[0]), "meta": {"line": meta.line, "column": meta.column}}
+            return {"type": "var", "name": sys.intern(str(a[0])), "meta": {"line": meta.line, "column": meta.column}}
         return a[0]
 
     def callable(self, meta, a):
@@ -323,7 +386,7 @@ class DSLTransformer(Transformer):
         return ("pos", a[0])
 
     def arg_kw(self, meta, a):
-        return ("kw", str(a[0]), a[1])
+        return ("kw", sys.intern(str(a[0])), a[1])
 
     def function_call(self, meta, a):
         fn = a[0]
@@ -339,7 +402,9 @@ class DSLTransformer(Transformer):
         
         return self.with_meta({
             "type": "call",
-            "name": fn,
+            # str internato, non Token: le lookup in env/functions non
+            # passano dal __eq__ Python di Token
+            "name": sys.intern(str(fn)),
             "args": args,
             "kwargs": kwargs
         }, meta)
@@ -351,7 +416,7 @@ class DSLTransformer(Transformer):
     def binary_op(self, meta, a):
         return self.with_meta({
             "type": "binop",
-            "op": str(a[1]),
+            "op": sys.intern(str(a[1])),
             "left": a[0],
             "right": a[2]
         }, meta)
@@ -387,9 +452,10 @@ class DSLTransformer(Transformer):
         }, meta)
 
     def pipe_node(self, meta, items):
+        # i token "|>" tra i passi non sono passi: scartati qui, una volta
         return self.with_meta({
             "type": "pipe",
-            "steps": items
+            "steps": [i for i in items if not (isinstance(i, Token) and i.type == "PIPE")]
         }, meta)
 
     # -------------------------------------------------
@@ -404,6 +470,193 @@ class DSLTransformer(Transformer):
             "items": []
         }, meta)
 
+# Il transformer non ha stato per-parse: un'istanza sola per tutti i parse
+TRANSFORMER = DSLTransformer()
+
+# ============================================================================
+# COMPILER (ESPRESSIONI PURE -> PYTHON)
+# ============================================================================
+
+class DSLCompiler:
+    """
+    Genera una funzione Python per i sottoalberi puri (letterali, variabili,
+    operatori): compilata una volta, viene eseguita da CPython senza
+    passare per il visitor. Liste e tuple di soli elementi puri sono
+    compilate anch'esse; chiamate e dict restano all'interprete.
+    """
+
+    BINARY = {
+        '+': '({} + {})', '-': '({} - {})', '*': '({} * {})',
+        '/': '({} / {})', '%': '({} % {})', '^': '({} ** {})',
+        '==': '({} == {})', '!=': '({} != {})', '>=': '({} >= {})',
+        '<=': '({} <= {})', '>': '({} > {})', '<': '({} < {})',
+        # and/or valutano entrambi i lati come l'interprete
+        'and': '_and({}, {})', 'or': '_or({}, {})',
+    }
+
+    def __init__(self):
+        # sorgente generato -> funzione: i letterali vi entrano con repr,
+        # quindi ogni espressione nuova è una voce; limitata come _PARSED
+        self.cache = BoundedCache(256)
+        self.namespace = {
+            '__builtins__': {},
+            '_and': OPS_FUNCTIONS['OP_AND'],
+            '_or': OPS_FUNCTIONS['OP_OR'],
+        }
+
+    def emit(self, node):
+        if not isinstance(node, dict):
+            return None
+
+        t = node.get("type")
+
+        if t in ("number", "string", "bool"):
+            return repr(node["value"])
+        if t == "any":
+            return "None"
+        if t in ("var", "typed_var"):
+            return "env.get({0!r}, {0!r})".format(node["name"])
+        if t == "not":
+            value = self.emit(node["value"])
+            return None if value is None else f"(not {value})"
+        if t == "binop":
+            template = self.BINARY.get(node["op"])
+            if template is None:
+                return None
+            left = self.emit(node["left"])
+            right = self.emit(node["right"])
+            if left is None or right is None:
+                return None
+            return template.format(left, right)
+        if t == "pipe" and len(node["steps"]) == 1:
+            return self.emit(node["steps"][0])
+        if t in ("list", "tuple"):
+            items = [self.emit(item) for item in node["items"]]
+            if None in items:
+                return None
+            if t == "list":
+                return "[{}]".format(", ".join(items))
+            return "({})".format("".join(item + ", " for item in items))
+
+        return None
+
+    def compile(self, node):
+        expr = self.emit(node)
+        if expr is None:
+            return None
+        return self.build(f"def _eval(env):\n    return {expr}\n")
+
+    def compile_dict(self, node):
+        # Dict di sole coppie pure (tipico corpo di funzione): una sola
+        # funzione che costruisce il risultato come fa visit_dict
+        lines = ["def _eval(env):", "    env = {**env}", "    result = {}"]
+
+        for item in node["items"]:
+            if not isinstance(item, dict) or item.get("type") != "pair":
+                return None
+
+            key = item["key"]
+            if key.get("type") == "var":
+                key = "env.get({0!r}, {0!r})".format(key["name"])
+            elif key.get("type") in ("number", "string", "bool"):
+                key = repr(key["value"])
+            else:
+                return None
+
+            value = self.emit(item["value"])
+            if value is None:
+                return None
+
+            lines.append(f"    value = {value}")
+            lines.append(f"    key = {key}")
+            lines.append("    result[key] = env[key] = value")
+
+        lines.append("    return result")
+        return self.build("\n".join(lines) + "\n")
+
+    def build(self, source):
+        fn = self.cache.get(source)
+        if fn is None:
+            namespace = dict(self.namespace)
+            try:
+                exec(compile(source, "<dsl>", "exec"), namespace)
+            except (SyntaxError, RecursionError, MemoryError):
+                return None
+            fn = self.cache[source] = namespace["_eval"]
+        return fn
+
+
+COMPILER = DSLCompiler()
+COMPILABLE = frozenset(("binop", "not", "pipe", "list", "tuple"))
+VARIABLES = frozenset(("var", "typed_var"))
+LITERALS = frozenset(("number", "string", "bool"))
+
+# Opcode dei programmi dict (vedi Interpreter._compile_dict)
+DICT_VISIT, DICT_PAIR_VAR, DICT_PAIR_CONST, DICT_DECLARE = range(4)
+
+# ============================================================================
+# OTTIMIZZATORE (PASSATA SULL'AST DOPO IL TRANSFORMER)
+# ============================================================================
+
+# Tipo Python del valore piegato -> tipo del nodo letterale
+FOLDED_TYPES = {bool: "bool", int: "number", float: "number", str: "string"}
+
+def optimize(node):
+    """
+    Semplifica l'AST una volta sola, prima di ogni visita: le pipe di un
+    solo passo lasciano il posto al passo e gli operatori con soli
+    letterali diventano il loro valore. Il resto dell'albero è invariato.
+    """
+    if isinstance(node, list):
+        return [optimize(n) for n in node]
+    if not isinstance(node, dict):
+        return node
+
+    node = {k: v if k == "meta" else optimize(v) for k, v in node.items()}
+    t = node.get("type")
+
+    if t == "pipe" and len(node["steps"]) == 1:
+        return node["steps"][0]
+
+    if t == "not":
+        value = node["value"]
+        if isinstance(value, dict) and value.get("type") in LITERALS:
+            return _folded(not value["value"], node)
+
+    if t == "binop":
+        left, right = node["left"], node["right"]
+        if (isinstance(left, dict) and left.get("type") in LITERALS
+                and isinstance(right, dict) and right.get("type") in LITERALS):
+            return _fold(node, left["value"], right["value"])
+
+    return node
+
+def _fold(node, left, right):
+    op = node["op"]
+    # niente potenze o ripetizioni di stringhe: il risultato può essere
+    # enorme e il ramo potrebbe non essere mai eseguito
+    if op == '^' or (op == '*' and (isinstance(left, str) or isinstance(right, str))):
+        return node
+
+    fn = BINARY_OPS.get(op)
+    if fn is None:
+        return node
+    try:
+        value = fn(left, right)
+    except Exception:
+        # l'errore resta all'interprete, con meta e stack trace
+        return node
+    return _folded(value, node)
+
+def _folded(value, node):
+    t = FOLDED_TYPES.get(type(value))
+    if t is None:
+        return node
+    folded = {"type": t, "value": value}
+    if "meta" in node:
+        folded["meta"] = node["meta"]
+    return folded
+
 # ============================================================================
 # TRIGGER ENGINE (SEPARATO)
 # ============================================================================
@@ -428,7 +681,8 @@ class TriggerEngine:
             try:
                 result = await self.visitor.visit(call_node, ctx)
                 if isinstance(result, dict) and result.get('success'):
-                    await self.visitor.visit(action, {**ctx, '@event': result.get('data')})
+                    # '@event' sopra al contesto, senza copiarlo ad ogni evento
+                    await self.visitor.visit(action, ChainMap({'@event': result.get('data')}, ctx))
                 else:
                     await asyncio.sleep(1)
             except asyncio.CancelledError:
@@ -437,7 +691,6 @@ class TriggerEngine:
                 await asyncio.sleep(5)
 
     async def _cron_loop(self, pattern, action, ctx):
-        import datetime
         framework_log("INFO", f"Cron trigger: {pattern}", emoji="⏰")
         while True:
             now = datetime.datetime.now()
@@ -472,9 +725,52 @@ class DSLRuntimeError(Exception):
 
 class Interpreter:
 
+    # Attributi fissi: letti ad ogni visita, senza passare da __dict__
+    __slots__ = (
+        "functions", "_node_stack", "_compiled", "_programs", "_bodies",
+        "_defs", "_returns", "_params", "_pipes",
+        "_builtins", "_dispatch",
+    )
+
     def __init__(self, functions=None):
         self.functions = functions or {}
         self._node_stack = [] 
+        # id(nodo) -> (nodo, funzione compilata o None)
+        self._compiled = {}
+        # id(nodo dict) -> (nodo, programma di _compile_dict)
+        self._programs = {}
+        # id(nodo dict) -> (nodo, funzione di COMPILER.compile_dict o None)
+        self._bodies = {}
+        # id(nodo function_def) -> (nodo, valore funzione)
+        self._defs = {}
+        # id(lista return) -> (lista, indice (tipo, nome, meta) o None)
+        self._returns = {}
+        # id(lista parametri) -> (lista, indice (tipo, nome) o None)
+        self._params = {}
+        # id(nodo pipe) -> (nodo, (primo passo, primo passo compilato, stadi,
+        # primo stadio non valido o None))
+        self._pipes = {}
+        # nome built-in -> (funzione, è una coroutine function); valida finché
+        # self.functions restituisce la stessa funzione per quel nome
+        self._builtins = {}
+        # tipo nodo -> funzione visit_<tipo> non legata, condivisa dalla classe
+        self._dispatch = self._dispatch_table()
+
+    @classmethod
+    def _dispatch_table(cls):
+        # Costruita per riflessione una volta per classe (anche per le
+        # sottoclassi, che possono aggiungere visit_<tipo>)
+        table = cls.__dict__.get("_DISPATCH_TABLE")
+        if table is None:
+            table = {
+                name[len("visit_"):]: getattr(cls, name)
+                for name in dir(cls) if name.startswith("visit_")
+            }
+            # le call vanno direttamente a _call: visit_call è solo un
+            # passaggio e costerebbe una coroutine in più per ogni chiamata
+            table["call"] = cls._call
+            cls._DISPATCH_TABLE = table
+        return table
 
     # =========================================================
     # ENTRY
@@ -508,35 +804,73 @@ class Interpreter:
             return node, env
 
         t = node.get("type")
-        method = getattr(self, f"visit_{t}", None)
+
+        # Una pipe di un solo passo è solo un involucro (es. attorno ad ogni
+        # binop): si scende al passo senza aprire un'altra visita
+        while t == "pipe":
+            steps = node["steps"]
+            if len(steps) != 1:
+                break
+            node = steps[0]
+            if not isinstance(node, dict):
+                return node, env
+            t = node.get("type")
+
+        # Foglie risolte qui: niente coroutine di visit_<tipo> per una lookup
+        if t in VARIABLES:
+            name = node["name"]
+            return env.get(name, name), env
+        if t in LITERALS:
+            return node["value"], env
+
+        if t in COMPILABLE:
+            entry = self._compiled.get(id(node))
+            if entry is None or entry[0] is not node:
+                entry = self._compiled[id(node)] = (node, COMPILER.compile(node))
+            if entry[1] is not None:
+                try:
+                    return entry[1](env), env
+                except Exception:
+                    # l'interprete ricostruisce l'errore con meta e stack trace
+                    pass
+
+        method = self._dispatch.get(t)
 
         if not method:
             raise DSLRuntimeError(f"Unknown node type: {t}", node.get("meta"))
 
-        if not hasattr(self, "_node_stack"):
-            self._node_stack = []
-
-        self._node_stack.append(node)
+        branch = _BRANCH_STACK.get()
+        node_stack = branch[1] if branch is not None and branch[0] is self else self._node_stack
+        node_stack.append(node)
         try:
-            res = await flow.act(flow.step(method, node,env))
-
-            if res.get('errors'):
-                # Solleva il primo errore già formattato
-                raise DSLRuntimeError(res['errors'][0])
-
-            return res.get('outputs')
-
+            return await method(self, node, env)
         except DSLRuntimeError as e:
-            # ricostruisci solo lo stack trace dei nodi, senza ripetere linee
-            trace = " -> ".join(
-                f"{n.get('type')}({n.get('meta', {}).get('line','?')}:{n.get('meta', {}).get('column','?')})"
-                for n in self._node_stack
-            )
-            # aggiorna il messaggio senza duplicare le linee
-            e.args = (f"{e.args[0]} | Stack trace: {trace}",)
+            self._trace(e, node_stack)
             raise
+        except Exception as e:
+            # qualsiasi errore del nodo diventa un DSLRuntimeError tracciato
+            error = DSLRuntimeError(str(e))
+            self._trace(error, node_stack)
+            raise error
         finally:
-            self._node_stack.pop()
+            node_stack.pop()
+
+    def _stack(self):
+        # stack del ramo parallelo in corso (vedi _start_branch) o quello
+        # principale dell'interprete
+        branch = _BRANCH_STACK.get()
+        if branch is not None and branch[0] is self:
+            return branch[1]
+        return self._node_stack
+
+    def _trace(self, e, node_stack=None):
+        # ricostruisci solo lo stack trace dei nodi, senza ripetere linee
+        trace = " -> ".join(
+            f"{n.get('type')}({n.get('meta', {}).get('line','?')}:{n.get('meta', {}).get('column','?')})"
+            for n in (self._stack() if node_stack is None else node_stack)
+        )
+        # aggiorna il messaggio senza duplicare le linee
+        e.args = (f"{e.args[0]} | Stack trace: {trace}",)
 
     # =========================================================
     # PRIMITIVES
@@ -570,10 +904,8 @@ class Interpreter:
         return env.get(name,name), env
 
     async def visit_typed_var(self, node, env):
-        return await self.visit_var(
-            {"name": node["name"], "meta": node["meta"]},
-            env
-        )
+        name = node["name"]
+        return env.get(name, name), env
 
     # =========================================================
     # DECLARATIONS
@@ -605,33 +937,114 @@ class Interpreter:
         return (key,value), env1|env2
 
     async def visit_list(self, node, env):
-        items = []
-        current_env = env
-
-        for item in node["items"]:
-            value, current_env = await self.visit(item, current_env)
-            items.append(value)
-
-        return items, current_env
+        return await self._visit_args(node["items"], env)
 
     async def visit_tuple(self, node, env):
-        items = []
-        current_env = env
+        items, current_env = await self._visit_args(node["items"], env)
+        return tuple(items), current_env
 
-        for item in node["items"]:
-            value, current_env = await self.visit(item, current_env)
-            items.append(value)
+    def _compile_dict(self, node):
+        # Abbassa gli item in (opcode, item, chiave, nodo valore, valore
+        # compilato): forma e nome della chiave si estraggono una volta sola
+        # e i valori puri vengono compilati subito (vedi DSLCompiler)
+        program = []
 
-        return tuple(items), current_env
+        for item in node["items"]:
+            t = item.get("type")
+
+            if t == "pair":
+                key = item["key"]
+                if key.get("type") == "var":
+                    program.append((DICT_PAIR_VAR, item, key["name"], item["value"],
+                                    COMPILER.compile(item["value"])))
+                    continue
+                if key.get("type") in ("number", "string", "bool"):
+                    program.append((DICT_PAIR_CONST, item, key["value"], item["value"],
+                                    COMPILER.compile(item["value"])))
+                    continue
+
+            elif t == "declaration":
+                target = item["target"]
+                if (target.get("type") == "pair"
+                        and target["key"].get("type") == "var"
+                        and target["value"].get("type") == "var"):
+                    names = (target["key"]["name"], target["value"]["name"])
+                    program.append((DICT_DECLARE, item, names, item["value"],
+                                    COMPILER.compile(item["value"])))
+                    continue
+
+            program.append((DICT_VISIT, item, None, None, None))
+
+        return program
 
     async def visit_dict(self, node, env):
+        body = self._cached(self._bodies, node, COMPILER.compile_dict)
+        if body is not None:
+            try:
+                return body(env), env
+            except Exception:
+                # l'interprete ricostruisce l'errore con meta e stack trace
+                pass
+
+        program = self._cached(self._programs, node, self._compile_dict)
+
         result = {}
+        node_stack = self._stack()
+
+        # Una sola copia dell'env per dict, aggiornata insieme a result
+        # (equivale a env | result ricalcolato ad ogni item)
+        evaluation_env = dict(env) if env else result
+
+        # metodi risolti una volta per dict, non ad ogni item
+        visit = self.visit
+        lookup = evaluation_env.get
+        push, pop = node_stack.append, node_stack.pop
+
+        for op, item, arg, value_node, fast in program:
+
+            if op == DICT_VISIT:
+                pair, _ = await visit(item, evaluation_env)
+                key, value = pair
+                result[key] = value
+                evaluation_env[key] = value
+                continue
+
+            # stesso stack trace di visit(item)
+            push(item)
+            try:
+                if fast is None:
+                    value, _ = await visit(value_node, evaluation_env)
+                else:
+                    try:
+                        value = fast(evaluation_env)
+                    except Exception:
+                        # l'interprete ricostruisce l'errore con meta e stack trace
+                        value, _ = await visit(value_node, evaluation_env)
+
+                if op == DICT_PAIR_VAR:
+                    key = lookup(arg, arg)
+                elif op == DICT_PAIR_CONST:
+                    key = arg
+                else:
+                    declared_type, key = arg
+                    declared_type = lookup(declared_type, declared_type)
+                    key = lookup(key, key)
+                    if declared_type in CUSTOM_TYPES:
+                        value = await self._check_type(value, declared_type, item.get("meta"), key)
+                    else:
+                        value = self._check_native(value, declared_type, item.get("meta"), key)
+            except DSLRuntimeError as e:
+                self._trace(e, node_stack)
+                raise
+            except Exception as e:
+                error = DSLRuntimeError(str(e))
+                self._trace(error, node_stack)
+                raise error
+            finally:
+                pop()
 
-        for item in node["items"]:
-            evaluation_env = env | result
-            pair, _ = await self.visit(item, evaluation_env)
-            key, value = pair
             result[key] = value
+            evaluation_env[key] = value
 
         return result, env
 
@@ -644,31 +1057,19 @@ class Interpreter:
         right, env2 = await self.visit(node["right"], env1)
 
         op = node["op"]
+        fn = BINARY_OPS.get(op)
 
-        try:
-            if op == "+": return left + right, env2
-            if op == "-": return left - right, env2
-            if op == "*": return left * right, env2
-            if op == "/": return left / right, env2
-            if op == "%": return left % right, env2
-            if op == "^": return left ** right, env2
-            if op == "==": return left == right, env2
-            if op == "!=": return left != right, env2
-            if op == ">": return left > right, env2
-            if op == "<": return left < right, env2
-            if op == ">=": return left >= right, env2
-            if op == "<=": return left <= right, env2
-            if op == "and": return left and right, env2
-            if op == "or": return left or right, env2
+        if fn is None:
+            raise DSLRuntimeError(
+                f"Unsupported operator '{op}'",
+                node.get("meta")
+            )
 
+        try:
+            return fn(left, right), env2
         except Exception as e:
             raise DSLRuntimeError(str(e), node.get("meta"))
 
-        raise DSLRuntimeError(
-            f"Unsupported operator '{op}'",
-            node.get("meta")
-        )
-
     async def visit_not(self, node, env):
         value, env2 = await self.visit(node["value"], env)
         return not value, env2
@@ -678,25 +1079,48 @@ class Interpreter:
     # =========================================================
 
     async def visit_pipe(self, node, env):
-        steps = node["steps"]
+        head, seed, stages, invalid = self._cached(self._pipes, node, self._index_pipe)
 
-        value, current_env = await self.visit(steps[0], env)
-
-        for step in steps[1:]:
-            if step["type"] != "call":
-                raise DSLRuntimeError(
-                    "Pipe expects function calls",
-                    step.get("meta")
-                )
+        if seed is None:
+            value, current_env = await self.visit(head, env)
+        else:
+            try:
+                value, current_env = seed(env), env
+            except Exception:
+                # l'interprete ricostruisce l'errore con meta e stack trace
+                value, current_env = await self.visit(head, env)
 
+        for step in stages:
             value, current_env = await self._call(
                 step,
                 current_env,
                 piped_value=value
             )
 
+        if invalid is not None:
+            raise DSLRuntimeError(
+                "Pipe expects function calls",
+                invalid.get("meta") if isinstance(invalid, dict) else None
+            )
+
         return value, current_env
 
+    def _index_pipe(self, node):
+        # Primo passo (compilato se puro), stadi successivi e primo stadio che
+        # non è una call, una volta sola. Gli stadi validi prima di quello
+        # invalido vengono comunque eseguiti, come prima
+        steps = node["steps"]
+
+        stages = []
+        invalid = None
+        for step in steps[1:]:
+            if not (isinstance(step, dict) and step.get("type") == "call"):
+                invalid = step
+                break
+            stages.append(step)
+
+        return steps[0], COMPILER.compile(steps[0]), tuple(stages), invalid
+
     # =========================================================
     # CALLS
     # =========================================================
@@ -792,66 +1216,217 @@ class Interpreter:
 
     async def _call(self, node, env, piped_value=None):
         name = node["name"]
+        func_obj = env.get(name, MISSING)
 
-        if name in env:
-            func_obj = env[name]
-
+        if func_obj is not MISSING:
             if isinstance(func_obj, tuple) and len(func_obj) == 3:
                 params_ast, body_ast, return_ast = func_obj
             else:
                 raise DSLRuntimeError(f"Invalid function object for '{name}'", node.get("meta"))
 
-            local_env = {}
-
             # Bind parametri
-            for param_node, arg_node in zip(params_ast, node["args"]):
-                param_type = param_node["key"]["name"]
-                param_name = param_node["value"]["name"]
-                arg_value, _ = await self.visit(arg_node, env)
-                arg_value = await self._check_type(arg_value, param_type, arg_node.get("meta"), param_name)
-                local_env[param_name] = arg_value
+            params = self._cached(self._params, params_ast, self._index_params)
+            arg_nodes = node["args"]
+            if params is None:
+                local_env = {}
+                for (param_type, param_name), arg_node in zip(
+                        ((p["key"]["name"], p["value"]["name"]) for p in params_ast), arg_nodes):
+                    arg_value, _ = await self.visit(arg_node, env)
+                    local_env[param_name] = await self._check_type(arg_value, param_type, arg_node.get("meta"), param_name)
+            else:
+                # Argomenti legati a un parametro valutati insieme (le call
+                # vengono risolte in parallelo, vedi _visit_args), controllati
+                # sul posto e legati ai nomi con un solo dict(zip(...))
+                pairs, checks, names = params
+                arg_nodes = arg_nodes[:len(pairs)]
+                values, _ = await self._visit_args(arg_nodes, env)
+                for i, ((param_type, param_name), check, arg_node) in enumerate(zip(pairs, checks, arg_nodes)):
+                    # CUSTOM_TYPES può crescere dopo l'indicizzazione: va
+                    # consultato ad ogni chiamata, prima del controllo nativo
+                    if param_type in CUSTOM_TYPES:
+                        values[i] = await self._check_type(values[i], param_type, arg_node.get("meta"), param_name)
+                    elif check is None or not check(values[i]):
+                        # tipo sconosciuto o valore errato: errore da _check_native
+                        self._check_native(values[i], param_type, arg_node.get("meta"), param_name)
+                local_env = dict(zip(names, values))
             
             # Esegui body
             result, _ = await self.visit(body_ast, local_env)
             out = None
             # Controllo tipo di ritorno
-            ret_node = func_obj[2]
-            for ty in ret_node:
-                pair,env = await self.visit(ty,local_env)
-                tipo,name = pair
-                if name in result:
-                    out = await self._check_type(result[name], tipo, ty.get("meta"))
-                    #print("####",ody_result)
+            returns = self._cached(self._returns, return_ast, self._index_returns)
+            if returns is None:
+                for ty in return_ast:
+                    pair, _ = await self.visit(ty,local_env)
+                    tipo,name = pair
+                    if name in result:
+                        out = await self._check_type(result[name], tipo, ty.get("meta"))
+            else:
+                for tipo, name, meta in returns:
+                    tipo = local_env.get(tipo, tipo)
+                    name = local_env.get(name, name)
+                    if name in result:
+                        if tipo in CUSTOM_TYPES:
+                            out = await self._check_type(result[name], tipo, meta)
+                        else:
+                            out = self._check_native(result[name], tipo, meta)
 
             return out, env
 
         # Built-in
-        if name not in self.functions:
-            raise DSLRuntimeError(f"Unknown function '{name}'", node.get("meta"))
-
-        fn = self.functions[name]
+        fn = self.functions.get(name, MISSING)
 
-        args = []
-        current_env = env
-        for a in node["args"]:
-            val, current_env = await self.visit(a, current_env)
-            args.append(val)
+        if fn is MISSING:
+            raise DSLRuntimeError(f"Unknown function '{name}'", node.get("meta"))
 
-        kwargs = {}
-        for k, v in node["kwargs"].items():
-            val, current_env = await self.visit(v, current_env)
-            kwargs[k] = val
+        builtin = self._builtins.get(name)
+        if builtin is None or builtin[0] is not fn:
+            builtin = self._builtins[name] = (fn, flow.is_coroutine_function(fn))
+
+        kwargs = node["kwargs"]
+        if kwargs:
+            # posizionali e keyword in un solo _visit_args, nell'ordine del
+            # sorgente: le call degli uni e degli altri vengono risolte insieme
+            arg_nodes = node["args"]
+            values, current_env = await self._visit_args([*arg_nodes, *kwargs.values()], env)
+            args = values[:len(arg_nodes)]
+            kwargs = dict(zip(kwargs, values[len(arg_nodes):]))
+        else:
+            args, current_env = await self._visit_args(node["args"], env)
 
         if piped_value is not None:
             args.insert(0, piped_value)
 
-        result = fn(*args, **kwargs)
-        if inspect.isawaitable(result):
+        # caso comune senza keyword: niente spacchettamento di un dict vuoto
+        result = fn(*args, **kwargs) if kwargs else fn(*args)
+        if builtin[1]:
+            result = await result
+        elif type(result) not in PLAIN_RESULTS and inspect.isawaitable(result):
             result = await result
 
         return result, current_env
 
 
+    def _cached(self, cache, node, build):
+        entry = cache.get(id(node))
+        if entry is None or entry[0] is not node:
+            entry = cache[id(node)] = (node, build(node))
+        return entry[1]
+
+    def _index_params(self, params_ast):
+        # Coppie tipo:nome dei parametri lette una volta sola, con il
+        # controllo nativo già risolto e i nomi pronti per il dict(zip(...));
+        # None se la forma non è quella attesa e va riletta (e segnalata) ad
+        # ogni chiamata
+        try:
+            pairs = tuple((p["key"]["name"], p["value"]["name"]) for p in params_ast)
+        except (KeyError, TypeError):
+            return None
+        checks = tuple(TYPE_CHECKS.get(param_type) for param_type, _ in pairs)
+        return pairs, checks, tuple(name for _, name in pairs)
+
+    def _index_returns(self, return_ast):
+        # Coppie tipo:nome dei ritorni lette una volta sola; None se non sono
+        # tutte var:var e serve la visita generica
+        index = []
+        for ty in return_ast:
+            if not (isinstance(ty, dict) and ty.get("type") == "pair"):
+                return None
+            key, value = ty["key"], ty["value"]
+            if not (isinstance(key, dict) and key.get("type") == "var"
+                    and isinstance(value, dict) and value.get("type") == "var"):
+                return None
+            index.append((key["name"], value["name"], ty.get("meta")))
+        return tuple(index)
+
+    async def _visit_args(self, nodes, env):
+        # Gli elementi "call" possono fare I/O: quando accanto a una call c'è
+        # un altro elemento da valutare, ogni call parte in un task proprio
+        # appena raggiunta. Gli elementi composti (binop, liste, ...) vengono
+        # valutati al loro posto, dopo che le call precedenti sono partite:
+        # le call iniziano nell'ordine del sorgente.
+        # Usato per argomenti, kwargs e item di liste/tuple
+        values = list(nodes)
+        current_env = env
+        visit = self.visit
+
+        calls = composites = 0
+        for a in values:
+            if isinstance(a, dict):
+                t = a.get("type")
+                if t == "call":
+                    calls += 1
+                elif t not in LITERALS and t not in VARIABLES:
+                    composites += 1
+        concurrent = calls > 0 and calls + composites > 1
+
+        branches = []
+        failed = None
+        started = True
+        try:
+            for i, a in enumerate(values):
+                if not isinstance(a, dict):
+                    continue
+                t = a.get("type")
+                # letterali e variabili senza aprire la coroutine di visit
+                if t in LITERALS:
+                    values[i] = a["value"]
+                elif t in VARIABLES:
+                    name = a["name"]
+                    values[i] = current_env.get(name, name)
+                elif t == "call" and concurrent:
+                    branches.append((i, self._start_branch(a, current_env)))
+                    started = False
+                else:
+                    if not started:
+                        # un giro del loop: le call avviate partono prima
+                        # di questo elemento
+                        await asyncio.sleep(0)
+                        started = True
+                    try:
+                        values[i], current_env = await visit(a, current_env)
+                    except DSLRuntimeError as e:
+                        failed = (i, e)
+                        break
+            if branches and failed is None:
+                await asyncio.wait([task for _, task in branches], return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            await self._cancel_branches(branches)
+
+        # l'errore del primo elemento fallito, come nella valutazione in
+        # sequenza; exception() anche sugli altri: nessun "never retrieved"
+        errors = [
+            (i, task.exception()) for i, task in branches
+            if not task.cancelled() and task.exception() is not None
+        ]
+        if failed is not None:
+            errors.append(failed)
+        if errors:
+            raise min(errors, key=lambda error: error[0])[1]
+
+        for i, task in branches:
+            values[i] = task.result()[0]
+        return values, current_env
+
+    def _start_branch(self, node, env):
+        # Un task per ramo, con la propria copia dello stack dei nodi: i
+        # trace di un ramo non contengono i nodi dei fratelli
+        return asyncio.ensure_future(self._branch(node, env, list(self._stack())))
+
+    async def _branch(self, node, env, node_stack):
+        # gira nel task del ramo: il set resta nel contesto di quel task
+        _BRANCH_STACK.set((self, node_stack))
+        return await self.visit(node, env)
+
+    async def _cancel_branches(self, branches):
+        # i rami ancora in corso dopo un errore (o un annullamento) vengono
+        # annullati e attesi
+        running = [task for _, task in branches if not task.done()]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.wait(running)
+
     # =========================================================
     # TYPE CHECK
     # =========================================================
@@ -861,6 +1436,10 @@ class Interpreter:
         return node, env
 
     async def visit_function_def(self, node, env):
+        # Il valore dipende solo dal nodo: stessa tupla ad ogni esecuzione
+        return self._cached(self._defs, node, self._build_function), env
+
+    def _build_function(self, node):
 
         # ----------------------
         # PARAMETRI
@@ -894,22 +1473,27 @@ class Interpreter:
             pair = r["items"][0]
             return_types.append(pair)
 
-        return (params, body_value, return_types), env
+        return (params, body_value, return_types)
 
     async def _check_type(self, value, expected_type, meta=None, var_name=None):
 
         if expected_type in CUSTOM_TYPES:
             return await scheme.normalize(value, CUSTOM_TYPES[expected_type])
 
-        py_type = TYPE_MAP.get(expected_type)
+        return self._check_native(value, expected_type, meta, var_name)
 
-        if py_type is None:
+    def _check_native(self, value, expected_type, meta=None, var_name=None):
+        # Tipi nativi: controllo sincrono, i chiamanti evitano la coroutine
+        # di _check_type quando il tipo non è in CUSTOM_TYPES
+        check = TYPE_CHECKS.get(expected_type)
+
+        if check is None:
             raise DSLRuntimeError(
                 f"Unknown type '{expected_type}'",
                 meta
             )
 
-        if not isinstance(value, py_type):
+        if not check(value):
             raise DSLRuntimeError(
                 f"Type error in '{var_name}': expected {expected_type}, "
                 f"got {type(value).__name__}",
@@ -923,14 +1507,48 @@ class Interpreter:
 # PUBLIC API (NO GLOBAL PARSER)
 # ============================================================================
 
+# grammatica -> Lark già costruito. L'analisi della grammatica si fa una
+# volta per processo; il parser resta comunque un argomento esplicito di
+# parse (nessun parser globale implicito). Earley e non LALR: la grammatica
+# ha collisioni reduce/reduce (dizionario vuoto vs espressioni)
+_PARSERS = {}
+
 def create_parser():
-    return Lark(GRAMMAR, parser='earley', propagate_positions=True)
+    parser = _PARSERS.get(GRAMMAR)
+    if parser is None:
+        parser = _PARSERS[GRAMMAR] = Lark(GRAMMAR, parser='earley', propagate_positions=True)
+    return parser
+
+# (grammatica, contenuto) -> AST: lo stesso sorgente non viene riparsato.
+# L'AST è di sola lettura per l'Interpreter, quindi viene condiviso (e con
+# lui le cache per nodo dell'Interpreter)
+_PARSED = BoundedCache(256)
+
+# Il Lark di _PARSERS e TRANSFORMER sono condivisi tra i thread di execute:
+# un parse alla volta. Le hit di _PARSED non prendono il lock
+_PARSE_LOCK = threading.Lock()
 
 @flow.action()
 def parse(content: str, parser: Lark,**data):
-    return DSLTransformer().transform(parser.parse(content))
+    key = (parser.source_grammar, content)
+    ast = _PARSED.get(key)
+    if ast is None:
+        with _PARSE_LOCK:
+            ast = _PARSED.get(key)
+            if ast is None:
+                ast = optimize(TRANSFORMER.transform(parser.parse(content)))
+                _PARSED[key] = ast
+    return ast
 
 @flow.action()
 async def execute(content_or_ast, parser, functions):
-    ast = parse(content_or_ast, parser) if isinstance(content_or_ast, str) else content_or_ast
+    if not isinstance(content_or_ast, str):
+        ast = content_or_ast
+    elif (parser.source_grammar, content_or_ast) in _PARSED or sys.platform == 'emscripten':
+        ast = parse(content_or_ast, parser)
+    else:
+        # Earley è CPU puro: un sorgente nuovo si parsa in un thread, così
+        # il loop continua a servire trigger e listener (parse è
+        # serializzato da _PARSE_LOCK)
+        ast = await asyncio.to_thread(parse, content_or_ast, parser)
     return await Interpreter(functions).run(ast)
\ No newline at end of file
@@ -0,0 +1,509 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import framework.service.language as language
+
+
+class Testinterpreter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """
+        Built-in di prova: boom fallisce, slow registra quando termina.
+        """
+        self.completed = []
+
+        async def boom(x):
+            await asyncio.sleep(0.01)
+            raise ValueError(f"boom{x}")
+
+        async def slow(x):
+            await asyncio.sleep(0.05)
+            self.completed.append(x)
+            return x
+
+        def pair(a, b=None):
+            return (a, b)
+
+        self.started = []
+
+        async def rec(x):
+            # registra l'avvio; i primi avviati finiscono per ultimi
+            self.started.append(x)
+            await asyncio.sleep(0.01 * (5 - x))
+            return x
+
+        self.functions = {'boom': boom, 'slow': slow, 'pair': pair, 'rec': rec}
+        self.parser = language.create_parser()
+
+    async def visit(self, source):
+        interpreter = language.Interpreter(self.functions)
+        try:
+            value, _ = await interpreter.visit(language.parse(source, self.parser), {})
+            return interpreter, value, None
+        except language.DSLRuntimeError as e:
+            return interpreter, None, e
+
+    async def test_concurrent_arguments(self):
+        """
+        Gli argomenti call vengono risolti insieme e nell'ordine giusto.
+        """
+        _, value, error = await self.visit('r: pair(slow(1), slow(2));')
+        self.assertIsNone(error)
+        self.assertEqual(value, {'r': (1, 2)})
+
+    async def test_concurrent_argument_error(self):
+        """
+        Un argomento che fallisce annulla i fratelli ancora in corso e il
+        trace non contiene i loro nodi.
+        """
+        cases = [
+            'r: pair(boom(1), slow(2));',
+            'r: [slow(2), boom(1)];',
+            'r: pair(pair(slow(2), boom(1)), slow(2));',
+            'function:fn_sum := (int:x, int:y), { s: x + y; }, (int:s);\nr: fn_sum(slow(2), boom(1));',
+        ]
+        for source in cases:
+            with self.subTest(source=source):
+                self.completed.clear()
+                interpreter, _, error = await self.visit(source)
+                self.assertIsNotNone(error)
+                self.assertTrue(str(error).startswith('boom1 | Stack trace: dict(1:1) -> '))
+                self.assertEqual(interpreter._node_stack, [])
+
+                await asyncio.sleep(0.1)
+                self.assertEqual(self.completed, [])
+
+    async def test_concurrent_argument_trace(self):
+        """
+        Lo stesso trace della valutazione in sequenza: nessun nodo fratello.
+        """
+        _, _, error = await self.visit('r: pair(boom(1), slow(2));')
+        first = str(error).split(' | Stack trace: ')[1]
+        self.assertEqual(first, 'dict(1:1) -> pair(1:1) -> call(1:4) -> call(1:9)')
+
+    async def test_call_order(self):
+        """
+        Argomenti call e composti insieme: le call partono nell'ordine del
+        sorgente, come nella valutazione in sequenza.
+        """
+        cases = [
+            ('r: pair(rec(1), rec(2) + 0);', (1, 2), [1, 2]),
+            ('r: pair(rec(1) + rec(2), rec(3));', (3, 3), [1, 2, 3]),
+            ('r: pair(rec(1), (rec(2), rec(3)));', (1, (2, 3)), [1, 2, 3]),
+            ('r: pair(rec(1) - 1, rec(2));', (0, 2), [1, 2]),
+        ]
+        for source, expected, order in cases:
+            with self.subTest(source=source):
+                self.started.clear()
+                _, value, error = await self.visit(source)
+                self.assertIsNone(error)
+                self.assertEqual(value, {'r': expected})
+                self.assertEqual(self.started, order)
+
+    async def test_collection_order(self):
+        """
+        Item di liste e tuple: le call partono nell'ordine del sorgente
+        anche accanto a item composti.
+        """
+        cases = [
+            ('r: [rec(3), rec(1) + rec(2)];', [3, 3], [3, 1, 2]),
+            ('r: [rec(1) + 0, rec(2)];', [1, 2], [1, 2]),
+            ('r: (rec(1), [rec(2) + 0, rec(3)]);', (1, [2, 3]), [1, 2, 3]),
+            ('r: [[rec(1), rec(2)], rec(3)];', [[1, 2], 3], [1, 2, 3]),
+        ]
+        for source, expected, order in cases:
+            with self.subTest(source=source):
+                self.started.clear()
+                _, value, error = await self.visit(source)
+                self.assertIsNone(error)
+                self.assertEqual(value, {'r': expected})
+                self.assertEqual(self.started, order)
+
+    async def test_function_argument_order(self):
+        """
+        Argomenti di una funzione DSL: le call partono nell'ordine del
+        sorgente, anche accanto ad argomenti composti.
+        """
+        function = 'function:fn_sum := (int:x, int:y), { s: x + y; }, (int:s);\n'
+        cases = [
+            ('r: fn_sum(rec(1), rec(2) + 0);', 3, [1, 2]),
+            ('r: fn_sum(rec(1) + rec(2), rec(3));', 6, [1, 2, 3]),
+            ('r: fn_sum(rec(2) - rec(1), rec(3));', 4, [2, 1, 3]),
+        ]
+        for source, expected, order in cases:
+            with self.subTest(source=source):
+                self.started.clear()
+                _, value, error = await self.visit(function + source)
+                self.assertIsNone(error)
+                self.assertEqual(value['r'], expected)
+                self.assertEqual(self.started, order)
+
+    async def test_keyword_argument_order(self):
+        """
+        Posizionali e keyword in un solo gruppo: un posizionale composto
+        parte prima delle call passate per keyword. Nodi costruiti a mano:
+        nel sorgente "b: x" dentro una call diventa un dizionario.
+        """
+        number = lambda value: {'type': 'number', 'value': value}
+        rec = lambda x: {'type': 'call', 'name': 'rec', 'args': [number(x)], 'kwargs': {}}
+        add = lambda left, right: {'type': 'binop', 'op': '+', 'left': left, 'right': right}
+        pair = lambda args, kwargs: {'type': 'call', 'name': 'pair', 'args': args, 'kwargs': kwargs}
+        cases = [
+            (pair([add(rec(1), number(0))], {'b': rec(2)}), (1, 2), [1, 2]),
+            (pair([add(rec(1), rec(2))], {'b': rec(3)}), (3, 3), [1, 2, 3]),
+            (pair([rec(1)], {'b': add(rec(2), number(0))}), (1, 2), [1, 2]),
+        ]
+        for node, expected, order in cases:
+            with self.subTest(node=node):
+                self.started.clear()
+                value, _ = await language.Interpreter(self.functions).visit(node, {})
+                self.assertEqual(value, expected)
+                self.assertEqual(self.started, order)
+
+    async def test_call_order_on_error(self):
+        """
+        Una call che fallisce: quelle prima di lei sono già partite e si
+        riporta il suo errore.
+        """
+        _, _, error = await self.visit('r: pair(rec(1), (boom(2), rec(3)));')
+        self.assertTrue(str(error).startswith('boom2'))
+        self.assertEqual(self.started[0], 1)
+
+    async def test_composite_arguments_concurrent(self):
+        """
+        Una call e un argomento composto restano concorrenti.
+        """
+        source = 'r: pair(slow(1), slow(2) + 0);'
+        language.parse(source, self.parser)
+        start = asyncio.get_running_loop().time()
+        _, value, _ = await self.visit(source)
+        self.assertEqual(value, {'r': (1, 2)})
+        self.assertLess(asyncio.get_running_loop().time() - start, 0.09)
+
+    async def test_dispatch_table(self):
+        """
+        Tabella di dispatch costruita una volta per classe; una sottoclasse
+        ha la sua, con i propri visit_<tipo>.
+        """
+        class Custom(language.Interpreter):
+            __slots__ = ()
+
+            async def visit_answer(self, node, env):
+                return 42, env
+
+        self.assertIs(language.Interpreter()._dispatch, language.Interpreter()._dispatch)
+        self.assertNotIn('answer', language.Interpreter()._dispatch)
+        value, _ = await Custom().visit({'type': 'list', 'items': [{'type': 'answer'}, {'type': 'number', 'value': 1}]}, {})
+        self.assertEqual(value, [42, 1])
+
+    async def test_first_failing_argument(self):
+        """
+        Se più argomenti falliscono si riporta il primo in ordine.
+        """
+        _, _, error = await self.visit('r: (boom(1), boom(2));')
+        self.assertTrue(str(error).startswith('boom1'))
+
+
+class Testcompiler(unittest.IsolatedAsyncioTestCase):
+
+    PRELUDE = 'int:a := 7; int:b := 2; int:z := 0; float:f := 2.5; str:s := "x";\n'
+
+    def setUp(self):
+        self.parser = language.create_parser()
+
+    async def run_both(self, source):
+        """
+        (valore o errore) con i sottoalberi compilati e con il solo interprete.
+        """
+        ast = language.parse(source, self.parser)
+        outcomes = []
+        for compiled in (True, False):
+            with mock.patch.object(language.COMPILER, 'compile', wraps=language.COMPILER.compile) as compile_node, \
+                 mock.patch.object(language.COMPILER, 'compile_dict', wraps=language.COMPILER.compile_dict) as compile_dict:
+                if not compiled:
+                    compile_node.side_effect = lambda node: None
+                    compile_dict.side_effect = lambda node: None
+                try:
+                    value, _ = await language.Interpreter().visit(ast, {})
+                    outcomes.append(('value', value))
+                except language.DSLRuntimeError as e:
+                    outcomes.append(('error', str(e)))
+        return ast, outcomes
+
+    def expression(self, ast, name='r'):
+        for item in ast['items']:
+            key = item.get('key') if isinstance(item, dict) else None
+            if isinstance(key, dict) and key.get('name') == name:
+                return item['value']
+
+    async def test_same_values(self):
+        """
+        Aritmetica, confronti e collezioni annidate: stesso valore compilati
+        e interpretati, e il sottoalbero viene davvero compilato.
+        """
+        expressions = [
+            'a + b', 'a - b', 'a / b', 'a % b', 'a ^ b', 'f + a', 'a - b - 1',
+            'a == b', 'a != b', 'a >= b', 'a <= b', 'a > b', 'a < b', 's == "x"',
+            '[a, b + 1]', '(a, b)', '[a, [b, (a, f)], "x"]', '(a, (b, [z]))',
+        ]
+        for expression in expressions:
+            with self.subTest(expression=expression):
+                ast, (compiled, interpreted) = await self.run_both(self.PRELUDE + f'r: {expression};')
+                self.assertIsNotNone(language.COMPILER.compile(self.expression(ast)))
+                self.assertEqual(compiled[0], 'value')
+                self.assertEqual(compiled, interpreted)
+
+    async def test_operator_nodes(self):
+        """
+        Operatori costruiti direttamente come nodi (*, and, or, not).
+        """
+        var = lambda name: {'type': 'var', 'name': name}
+        number = lambda value: {'type': 'number', 'value': value}
+        nodes = [
+            {'type': 'binop', 'op': '*', 'left': var('a'), 'right': number(3)},
+            {'type': 'binop', 'op': 'and', 'left': var('a'), 'right': var('z')},
+            {'type': 'binop', 'op': 'or', 'left': var('z'), 'right': var('b')},
+            {'type': 'not', 'value': var('z')},
+            {'type': 'tuple', 'items': [{'type': 'not', 'value': var('a')}, number(1)]},
+        ]
+        env = {'a': 7, 'b': 2, 'z': 0}
+        for node in nodes:
+            with self.subTest(node=node):
+                compiled = language.COMPILER.compile(node)
+                self.assertIsNotNone(compiled)
+                with mock.patch.object(language.COMPILER, 'compile', return_value=None):
+                    interpreted, _ = await language.Interpreter().visit(node, env)
+                self.assertEqual(compiled(env), interpreted)
+
+    async def test_same_errors(self):
+        """
+        Divisione per zero ed errori di tipo in un sottoalbero compilato: lo
+        stesso DSLRuntimeError (posizione e trace) dell'interprete.
+        """
+        sources = [
+            'r: a / z;',
+            'r: a % z;',
+            'r: a + s;',
+            'r: s - a;',
+            'r: a < s;',
+            'r: [a, (b, a / z)];',
+            'function:fn_div := (int:x), { q: 10 / x; }, (float:q);\nr: fn_div(z);',
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                _, (compiled, interpreted) = await self.run_both(self.PRELUDE + source)
+                self.assertEqual(compiled[0], 'error')
+                self.assertIn('(line ', compiled[1])
+                self.assertEqual(compiled, interpreted)
+
+    def test_cache_bounded(self):
+        """
+        Ogni letterale nuovo genera un sorgente diverso: la cache delle
+        funzioni compilate resta limitata.
+        """
+        compiler = language.DSLCompiler()
+        for i in range(compiler.cache.maxsize + 50):
+            node = {'type': 'binop', 'op': '+', 'left': {'type': 'var', 'name': 'a'}, 'right': {'type': 'number', 'value': i}}
+            self.assertEqual(compiler.compile(node)({'a': 1}), i + 1)
+        self.assertEqual(len(compiler.cache), compiler.cache.maxsize)
+
+
+class Testoptimize(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.parser = language.create_parser()
+
+    def count(self, node, types):
+        if isinstance(node, list):
+            return sum(self.count(n, types) for n in node)
+        if not isinstance(node, dict):
+            return 0
+        own = 1 if node.get('type') in types else 0
+        return own + sum(self.count(v, types) for k, v in node.items() if k != 'meta')
+
+    async def run_both(self, source):
+        """
+        (AST, valore o errore) per l'AST ottimizzato e per quello grezzo.
+        """
+        raw = language.TRANSFORMER.transform(self.parser.parse(source))
+        outcomes = []
+        for ast in (language.optimize(raw), raw):
+            try:
+                value, _ = await language.Interpreter().visit(ast, {})
+                outcomes.append((ast, ('value', value)))
+            except language.DSLRuntimeError as e:
+                outcomes.append((ast, ('error', str(e))))
+        return outcomes
+
+    async def test_folded_values(self):
+        """
+        Le espressioni di soli letterali diventano un letterale con lo stesso
+        valore e la stessa posizione.
+        """
+        sources = [
+            'r: 2 + 3 - 1;', 'r: 10 / 4;', 'r: 7 % 3 == 1;', 'r: "a" + "b";',
+            'r: 3 > 2;', 'r: 1.5 + 2;', 'r: [1 + 1, (2 - 1, 3)];',
+            'int:r := 4 - 1;',
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                (folded, folded_out), (raw, raw_out) = await self.run_both(source)
+                self.assertEqual(folded_out, raw_out)
+                self.assertEqual(folded_out[0], 'value')
+                self.assertGreater(self.count(raw, ('binop', 'pipe')), 0)
+                self.assertEqual(self.count(folded, ('binop', 'pipe')), 0)
+
+    async def test_unfolded_values(self):
+        """
+        Potenze e operazioni con variabili restano all'interprete.
+        """
+        sources = ['r: 2 ^ 10;', 'int:a := 3; r: a + 1 - 2;']
+        for source in sources:
+            with self.subTest(source=source):
+                (folded, folded_out), (_, raw_out) = await self.run_both(source)
+                self.assertEqual(folded_out, raw_out)
+                self.assertGreater(self.count(folded, ('binop',)), 0)
+
+    async def test_error_position(self):
+        """
+        Un'operazione tra letterali che fallisce non viene piegata: l'errore
+        esce a run time con la stessa posizione e lo stesso trace.
+        """
+        sources = ['r: 1 / 0;', 'r: 1 + "x";', 'r: [1, 2 - "a"];', 'x: 1;\nr: (2, 3 % 0);']
+        for source in sources:
+            with self.subTest(source=source):
+                (_, folded_out), (_, raw_out) = await self.run_both(source)
+                self.assertEqual(folded_out[0], 'error')
+                self.assertEqual(folded_out, raw_out)
+        (_, (_, message)), _ = await self.run_both('x: 1;\nr: (2, 3 % 0);')
+        self.assertIn('(line 2:', message)
+
+
+class Testwildcard(unittest.TestCase):
+
+    def test_star_positions(self):
+        """
+        '*' all'inizio, in mezzo e in fondo; anche su una sequenza vuota.
+        """
+        cases = [
+            ('*.error', 'log.error', True), ('*.error', '.error', True), ('*.error', 'log.errors', False),
+            ('log.*.x', 'log.a.b.x', True), ('log.*.x', 'log..x', True), ('log.*.x', 'log.x', False),
+            ('log.*', 'log.', True), ('log.*', 'log.info', True), ('log.*', 'logs.info', False),
+            ('*', '', True), ('*', 'a.b', True), ('**', 'abc', True), ('*a*', 'bab', True), ('*a*', 'bbb', False),
+        ]
+        for pattern, data, expected in cases:
+            with self.subTest(pattern=pattern, data=data):
+                self.assertIs(language.wildcard_match(data, pattern), expected)
+
+    def test_empty_pattern(self):
+        """
+        Il pattern vuoto accetta solo la stringa vuota.
+        """
+        self.assertTrue(language.wildcard_match('', ''))
+        self.assertFalse(language.wildcard_match('a', ''))
+
+    def test_literal(self):
+        """
+        Senza wildcard il confronto è esatto; i caratteri speciali delle
+        regex restano letterali.
+        """
+        self.assertTrue(language.wildcard_match('info', 'info'))
+        self.assertFalse(language.wildcard_match('info.x', 'info'))
+        self.assertFalse(language.wildcard_match('inf', 'info'))
+        for pattern in ('a.b', 'a+b', '(a|b)', '[ab]', 'a$', '^a', 'a\\b', 'a{2}'):
+            with self.subTest(pattern=pattern):
+                self.assertTrue(language.wildcard_match(pattern, pattern))
+        self.assertFalse(language.wildcard_match('axb', 'a.b'))
+        self.assertFalse(language.wildcard_match('a', '[ab]'))
+
+    def test_question_mark(self):
+        self.assertTrue(language.wildcard_match('log1', 'log?'))
+        self.assertFalse(language.wildcard_match('log', 'log?'))
+        self.assertFalse(language.wildcard_match('log12', 'log?'))
+
+    def test_non_string_and_newline(self):
+        """
+        data e pattern vengono convertiti con str; '*' e '?' coprono anche
+        l'a capo.
+        """
+        self.assertTrue(language.wildcard_match(42, '4*'))
+        self.assertTrue(language.wildcard_match(42, 42))
+        self.assertTrue(language.wildcard_match('a\nb', 'a*'))
+        self.assertTrue(language.wildcard_match('a\nb', 'a?b'))
+
+    def test_domain_filter(self):
+        """
+        Come in console.read e nei listener http: filtro dei domini.
+        """
+        domains = ['info', 'info.user', 'error', 'error.db.write', 'debug']
+        select = lambda pattern: [d for d in domains if language.wildcard_match(d, pattern)]
+        self.assertEqual(select('info*'), ['info', 'info.user'])
+        self.assertEqual(select('*.*'), ['info.user', 'error.db.write'])
+        self.assertEqual(select('error.*.write'), ['error.db.write'])
+        self.assertEqual(select('*o*'), ['info', 'info.user', 'error', 'error.db.write'])
+        self.assertEqual(select('debug'), ['debug'])
+        self.assertEqual(select(''), [])
+
+
+class Testparse(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.parser = language.create_parser()
+        self.sources = [
+            f'int:a := {i}; r{i}: [a + {i}, (a, "s{i}")]; q: a - 1 >= {i % 3};'
+            for i in range(12)
+        ]
+        for source in self.sources:
+            language._PARSED.pop((self.parser.source_grammar, source), None)
+
+    def reference(self, source):
+        return language.optimize(language.TRANSFORMER.transform(self.parser.parse(source)))
+
+    def test_concurrent_parse(self):
+        """
+        Parse da più thread: stessi AST del parse in sequenza e mai due
+        parse Earley sovrapposti sul parser condiviso.
+        """
+        expected = [self.reference(source) for source in self.sources]
+        parse = self.parser.parse
+        active, overlaps, guard = [0], [], threading.Lock()
+
+        def tracked(*args, **kwargs):
+            with guard:
+                active[0] += 1
+                overlaps.append(active[0])
+            try:
+                time.sleep(0.001)
+                return parse(*args, **kwargs)
+            finally:
+                with guard:
+                    active[0] -= 1
+
+        with mock.patch.object(self.parser, 'parse', side_effect=tracked):
+            with ThreadPoolExecutor(6) as pool:
+                results = list(pool.map(lambda source: language.parse(source, self.parser), self.sources * 2))
+
+        self.assertEqual(results, expected * 2)
+        self.assertEqual(max(overlaps), 1)
+        self.assertEqual(len(overlaps), len(self.sources))
+
+    async def test_concurrent_execute(self):
+        """
+        execute in parallelo su sorgenti nuovi: ognuno il suo risultato.
+        """
+        results = await asyncio.gather(*(
+            language.execute(source, self.parser, {}) for source in self.sources
+        ))
+        for i, result in enumerate(results):
+            with self.subTest(i=i):
+                result = result['outputs']
+                self.assertEqual(result[f'r{i}'], [2 * i, (i, f's{i}')])
+                self.assertEqual(result['q'], i - 1 >= i % 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
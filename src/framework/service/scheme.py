@@ -7,6 +7,7 @@ from urllib.parse import urlparse, urlencode
 from jinja2 import Environment
 from cerberus import Validator
 from framework.service.diagnostic import LogReportEncoder, framework_log, buffered_log, _load_resource
+from framework.service.cache import BoundedCache
 
 mappa = {
     (str,dict,''): lambda v: v if isinstance(v, dict) else {},
@@ -39,45 +40,72 @@ async def convert(target, output,input=''):
     except Exception as e:
         raise ValueError(f"Errore conversione: {e}")
 
-def get(data, path, default=None):
-    result = default
+# path -> ((chiave, indice o None), ...): ogni path viene spezzato una volta sola
+_PATHS = BoundedCache(4096)
+
+def _split_path(path):
+    parts = _PATHS.get(path)
+    if parts is None:
+        chunks = path.split(".")
+        # "a." si ferma ad "a", come faceva partition
+        if len(chunks) > 1 and not chunks[-1]:
+            chunks.pop()
+
+        parts = []
+        for key in chunks:
+            index = None
+            if key.lstrip("-").isdigit():
+                try:
+                    index = int(key)
+                except ValueError:
+                    pass
+            parts.append((key, index))
 
-    if path:
-        key, _, rest = path.partition(".")
+        parts = _PATHS[path] = tuple(parts)
+    return parts
+
+def _walk(data, parts, start, default):
+    for i in range(start, len(parts)):
+        key, index = parts[i]
 
         if key == "*" and isinstance(data, (list, tuple)):
-            result = [get(x, rest, default) for x in data]
+            return [_walk(x, parts, i + 1, default) for x in data]
 
-        else:
-            try:
-                if isinstance(data, (list, tuple)):
-                    if key.lstrip("-").isdigit():
-                        value = data[int(key)]
-                    else:
-                        value = default
-                elif isinstance(data, dict):
-                    value = data.get(key, default)
-                else:
-                    value = getattr(data, key, default)
-
-                if rest and value is not default:
-                    result = get(value, rest, default)
-                else:
-                    result = value
-
-            except (IndexError, TypeError, ValueError):
-                result = default
-
-    else:
-        result = data
+        try:
+            if isinstance(data, (list, tuple)):
+                value = data[index] if index is not None else default
+            elif isinstance(data, dict):
+                value = data.get(key, default)
+            else:
+                value = getattr(data, key, default)
+        except (IndexError, TypeError, ValueError):
+            return default
 
-    return result
+        if value is default:
+            return default
+        data = value
+
+    return data
+
+def get(data, path, default=None):
+    if not path:
+        return data
+    return _walk(data, _split_path(path), 0, default)
+
+def _get_filter(d, k, default=None):
+    return d.get(k, default) if isinstance(d, dict) else default
+
+# Ambiente Jinja condiviso e template -> Template compilato: ogni stringa
+# viene compilata una volta sola, non ad ogni format
+_JINJA = Environment()
+_JINJA.filters['get'] = _get_filter
+_TEMPLATES = BoundedCache(512)
 
 async def format(target ,**constants):
     try:
-        jinjaEnv = Environment()
-        jinjaEnv.filters['get'] = lambda d, k, default=None: d.get(k, default) if isinstance(d, dict) else default
-        template = jinjaEnv.from_string(target)
+        template = _TEMPLATES.get(target)
+        if template is None:
+            template = _TEMPLATES[target] = _JINJA.from_string(target)
         return template.render(constants)
     except Exception as e:
         raise ValueError(f"Errore formattazione: {e}")
@@ -134,9 +162,9 @@ def transform(data_dict, mapper, values, input, output):
     def find_matching_keys(mapper, target_dict):
         if not isinstance(mapper, dict) or not isinstance(target_dict, dict):
             return None
-        target_keys = set(target_dict.keys())
-        for key in mapper.keys():
-            if key in target_keys:
+        # le chiavi di un dict sono già un insieme: niente copia in set()
+        for key in mapper:
+            if key in target_dict:
                 return key
         return None
     translated = {}
@@ -0,0 +1,123 @@
+import random
+import unittest
+
+import framework.service.scheme as scheme
+
+
+def reference(data, path, default=None):
+    """
+    Il get ricorsivo originale, usato come riferimento.
+    """
+    if not path:
+        return data
+    key, _, rest = path.partition(".")
+    if key == "*" and isinstance(data, (list, tuple)):
+        return [reference(x, rest, default) for x in data]
+    try:
+        if isinstance(data, (list, tuple)):
+            value = data[int(key)] if key.lstrip("-").isdigit() else default
+        elif isinstance(data, dict):
+            value = data.get(key, default)
+        else:
+            value = getattr(data, key, default)
+        if rest and value is not default:
+            return reference(value, rest, default)
+        return value
+    except (IndexError, TypeError, ValueError):
+        return default
+
+
+class Item:
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+DATA = {
+    'user': {'name': 'ada', 'tags': ['a', 'b', 'c'], 'address': {'city': 'Roma', 'zip': None}},
+    'items': [{'id': 1, 'price': 2.5}, {'id': 2, 'price': 4}, {'id': 3}],
+    'matrix': [[1, 2], [3, 4]],
+    'pair': ('x', {'y': 'z'}),
+    'object': Item(value=7, nested={'k': 'v'}),
+    1: 'int key',
+    (1, 2): 'tuple key',
+    '1': 'str key',
+    '': 'empty key',
+    'a.b': 'dotted key',
+    'zero': 0,
+}
+
+
+class Testget(unittest.TestCase):
+
+    def test_dotted_paths(self):
+        self.assertEqual(scheme.get(DATA, 'user.name'), 'ada')
+        self.assertEqual(scheme.get(DATA, 'user.address.city'), 'Roma')
+        self.assertEqual(scheme.get(DATA, 'object.value'), 7)
+        self.assertEqual(scheme.get(DATA, 'object.nested.k'), 'v')
+        self.assertEqual(scheme.get(DATA, 'user.'), DATA['user'])
+        self.assertIs(scheme.get(DATA, ''), DATA)
+        self.assertIs(scheme.get(DATA, None), DATA)
+
+    def test_list_indices(self):
+        self.assertEqual(scheme.get(DATA, 'user.tags.0'), 'a')
+        self.assertEqual(scheme.get(DATA, 'user.tags.-1'), 'c')
+        self.assertEqual(scheme.get(DATA, 'matrix.1.0'), 3)
+        self.assertEqual(scheme.get(DATA, 'pair.1.y'), 'z')
+        self.assertEqual(scheme.get(DATA, 'items.*.id'), [1, 2, 3])
+        self.assertEqual(scheme.get(DATA, 'items.*.price', 0), [2.5, 4, 0])
+        self.assertEqual(scheme.get(DATA, 'matrix.*.1'), [2, 4])
+        self.assertEqual(scheme.get(DATA, 'matrix.*'), DATA['matrix'])
+        self.assertIsNone(scheme.get(DATA, 'user.tags.3'))
+        self.assertIsNone(scheme.get(DATA, 'user.tags.x'))
+
+    def test_missing_with_default(self):
+        """
+        Una chiave mancante a qualsiasi livello restituisce default; un
+        valore None presente non è una chiave mancante.
+        """
+        self.assertEqual(scheme.get(DATA, 'missing', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'user.missing.deeper', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'user.tags.9', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'object.missing', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'zero.x', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'zero', 'd'), 0)
+        self.assertIsNone(scheme.get(DATA, 'user.address.zip', 'd'))
+        self.assertEqual(scheme.get(None, 'a.b', 'd'), 'd')
+
+    def test_non_string_keys(self):
+        """
+        I segmenti del percorso sono stringhe: chiavi int o tuple di un dict
+        non vengono trovate, la chiave stringa '1' sì.
+        """
+        self.assertEqual(scheme.get(DATA, '1'), 'str key')
+        self.assertEqual(scheme.get({1: 'int key'}, '1', 'd'), 'd')
+        self.assertEqual(scheme.get({(1, 2): 'x'}, '1.2', 'd'), 'd')
+        self.assertEqual(scheme.get({'a': {2: 'x'}}, 'a.2', 'd'), 'd')
+        self.assertEqual(scheme.get(DATA, 'a.b', 'd'), 'd')
+
+    def test_cached_paths(self):
+        """
+        Lo stesso percorso su dati diversi: la cache non trattiene valori.
+        """
+        self.assertEqual(scheme.get({'a': [1, 2]}, 'a.1'), 2)
+        self.assertEqual(scheme.get({'a': {'1': 'x'}}, 'a.1'), 'x')
+        self.assertEqual(scheme.get({'a': (5,)}, 'a.1', 'd'), 'd')
+
+    def test_same_as_recursive(self):
+        """
+        Percorsi casuali: stesso risultato del get ricorsivo originale.
+        """
+        rnd = random.Random(3)
+        segments = ['user', 'name', 'tags', 'address', 'city', 'zip', 'items', 'id', 'price',
+                    'matrix', 'pair', 'object', 'value', 'nested', 'k', 'y', 'zero', 'missing',
+                    '*', '0', '1', '2', '-1', '-4', '9', '', 'a', 'b']
+        for _ in range(3000):
+            path = '.'.join(rnd.choice(segments) for _ in range(rnd.randint(1, 5)))
+            default = rnd.choice([None, 'd'])
+            with self.subTest(path=path, default=default):
+                self.assertEqual(scheme.get(DATA, path, default), reference(DATA, path, default))
+
+
+if __name__ == '__main__':
+    unittest.main()
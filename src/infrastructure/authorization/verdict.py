@@ -5,7 +5,19 @@ imports = {
 import json
 from typing import Dict, Any
 import mistql # Motore di query sicuro
+try:
+    # moduli interni di mistql (verificati sulla 0.4.x, vedi requirements.txt)
+    from mistql.parse import parse as mistql_parse
+    from mistql.execute import execute_outer
+    from mistql.gardenwall import input_garden_wall, output_garden_wall
+except ImportError:
+    mistql_parse = None
 import asyncio
+
+# Stampe di debug per ogni regola valutata: spente, non formattano nulla
+# (né il contesto in JSON) ad ogni check
+DEBUG = False
+
 # La classe adapter gestisce il caricamento e la valutazione delle policy
 class adapter():
     
@@ -13,6 +25,8 @@ class adapter():
         self.config = constants.get('config')
         self._policies: Dict[str, Dict] = {}
         self._data_store: Dict[str, Any] = {}
+        # AST MistQL per condizione: il parse costa molto più della valutazione
+        self._queries: Dict[str, Any] = {}
 
     # ------------------------------
     # POLICY COMPILATION & LOADING
@@ -36,6 +50,18 @@ class adapter():
     # POLICY EVALUATION (MistQL)
     # ------------------------------
 
+    def _query(self, condition: str, context: Dict[str, Any]) -> Any:
+        """
+        Equivalente a mistql.query, ma con la condizione parsata una sola volta.
+        Senza i moduli interni di mistql si ripiega su mistql.query.
+        """
+        if mistql_parse is None:
+            return mistql.query(condition, context)
+        ast = self._queries.get(condition)
+        if ast is None:
+            ast = self._queries[condition] = mistql_parse(condition)
+        return output_garden_wall(execute_outer(ast, input_garden_wall(context), {}))
+
     def _evaluate_rule(self, rule: Dict, context: Dict[str, Any]) -> bool:
         """
         Valuta una singola regola usando l'espressione MistQL contenuta in 'condition'.
@@ -50,17 +76,19 @@ class adapter():
         safe_context = context
 
         # ➤ DEBUG STEP: log condition before evaluation
-        print("\n🧪 Evaluating Rule")
-        print("Effect:", effect)
-        print("Condition:", condition_mistql_string)
-        print("Context:", json.dumps(safe_context, indent=2))
+        if DEBUG:
+            print("\n🧪 Evaluating Rule")
+            print("Effect:", effect)
+            print("Condition:", condition_mistql_string)
+            print("Context:", json.dumps(safe_context, indent=2))
 
         # 2. Evaluation con MistQL
         try:
             # MistQL valuta l'espressione (stringa) sul dizionario di contesto (safe_context)
-            result = mistql.query(condition_mistql_string, safe_context)
+            result = self._query(condition_mistql_string, safe_context)
             
-            print(f"➡️ Result: {result} (Type: {type(result).__name__})")
+            if DEBUG:
+                print(f"➡️ Result: {result} (Type: {type(result).__name__})")
         except Exception as e:
             # Cattura errori di sintassi MistQL o errori di runtime
             print("\n❌ MISTQL EVALUATION ERROR")
@@ -19,6 +19,10 @@ def add_query_params(url, params):
 
 modules = {'flow': 'framework.service.flow',}
 
+# Stampe di debug di richieste e risposte: spente, non formattano nulla
+# ad ogni richiesta (contengono anche il token negli header)
+DEBUG = False
+
 if sys.platform == 'emscripten':
     import pyodide
     import json
@@ -35,7 +39,8 @@ if sys.platform == 'emscripten':
                 response = await pyodide.http.pyfetch(url, method=method, headers=headers,body=payload)
         if response.status in [200, 201]:
             data = await response.json()
-            print(data)
+            if DEBUG:
+                print(data)
             return {"state": True, "result": data}
         else:
             return {"state": False, "result":[],"remark": f"Request failed with status {response.status}"}
@@ -66,7 +71,8 @@ class adapter():
 
     @flow.asynchronous()
     async def request(self, **constants):
-        print(f"DEBUG - Request: {constants}")
+        if DEBUG:
+            print(f"DEBUG - Request: {constants}")
         headers = {
             "Authorization": f"{self.authorization.strip()} {self.token.strip()}",
             #"Accept": self.accept,
@@ -95,21 +101,23 @@ class adapter():
 
         #if payload and method == 'GET':
         #    url += '?' + urlencode(payload)
-        print(f"DEBUG - URL: {url}")
-        print(f"DEBUG - Headers: {headers}")
-        print(f"DEBUG - Payload: {payload}")
+        if DEBUG:
+            print(f"DEBUG - URL: {url}")
+            print(f"DEBUG - Headers: {headers}")
+            print(f"DEBUG - Payload: {payload}")
         resp = await backend(method,url,headers,payload)
-        print('request:',constants,'output:',resp)
+        if DEBUG:
+            print('request:',constants,'output:',resp)
 
 
         ok = []
         for x in self.listeners.keys():
             
-            matching_domains = language.wildcard_match(domain, x)
-            if len(matching_domains) == 1:
+            if language.wildcard_match(domain, x):
                 ok.append(x)
 
-        print(ok,self.listeners,'<==api')
+        if DEBUG:
+            print(ok,self.listeners,'<==api')
         
         for x in ok:
             listener = self.listeners.get(x)
@@ -119,7 +127,8 @@ class adapter():
         
     @flow.asynchronous(outputs='transaction')
     async def post(self, **constants):
-        print(f"DEBUG - Post: {constants}")
+        if DEBUG:
+            print(f"DEBUG - Post: {constants}")
         return await self.request(**constants|{'method':'POST'})
 
     @flow.asynchronous()